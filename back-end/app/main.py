@@ -1,14 +1,21 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from app.config import get_settings
-from app.routes import users, pets, products, cart, wishlist, orders, uploads
+from app.routes import users, pets, products, cart, wishlist, orders, uploads, search, admin, stats
 from app.services.prisma_client import prisma_client
+from app.services import facets, fbase_service, images, search_index, entity_cache, metrics, invalidation, order_events, admission, readiness, similarity, replica, wishlist_membership
+from app.services.entity_cache import pet_cache, product_cache
+from app.services.serialization import FastJSONResponse
 import os
 
 settings = get_settings()
 
-app = FastAPI()
+app = FastAPI(default_response_class=FastJSONResponse)
+
+# Admission runs inside CORS so 429/503 responses stay readable by the browser.
+app.add_middleware(admission.AdmissionMiddleware)
 
 # CORS
 app.add_middleware(
@@ -17,15 +24,35 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "ETag", "Retry-After", "Accept-Ranges", "Content-Range"],
 )
+app.add_middleware(metrics.MetricsMiddleware)
+metrics.register_collector(entity_cache.metric_lines)
+metrics.register_collector(invalidation.metric_lines)
+metrics.register_collector(order_events.metric_lines)
+metrics.register_collector(admission.metric_lines)
+metrics.register_collector(replica.metric_lines)
+metrics.register_collector(wishlist_membership.metric_lines)
 
 @app.on_event("startup")
 async def startup():
-    await prisma_client.connect()
+    warm_up = [("database", prisma_client.connect), ("facets", facets.rebuild), ("similarity", similarity.build)]
+    if settings.SEARCH_BACKEND == "memory":
+        warm_up.append(("search", search_index.ensure_loaded))
+    readiness.start(warm_up)
+    fbase_service.start_key_refresh()
+    invalidation.start_listener()
+    replica.start_monitor()
 
 @app.on_event("shutdown")
 async def shutdown():
-    await prisma_client.disconnect()
+    await readiness.stop()
+    await invalidation.stop_listener()
+    await replica.stop_monitor()
+    await fbase_service.stop_key_refresh()
+    images.shutdown_pool()
+    if prisma_client.is_connected():
+        await prisma_client.disconnect()
 
 app.include_router(users.router, prefix="/api/v1")
 app.include_router(pets.router, prefix="/api/v1")
@@ -34,18 +61,39 @@ app.include_router(cart.router, prefix="/api/v1")
 app.include_router(wishlist.router, prefix="/api/v1")
 app.include_router(orders.router, prefix="/api/v1")
 app.include_router(uploads.router, prefix="/api/v1")
+app.include_router(search.router, prefix="/api/v1")
+app.include_router(admin.router, prefix="/api/v1")
+app.include_router(stats.router, prefix="/api/v1")
 
 if os.path.exists("uploads"):
     app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
 
 @app.get("/health")
+@app.get("/health/live")
 async def health():
     return {"status": "healthy"}
 
+@app.get("/health/ready")
+async def ready(response: Response):
+    database = await readiness.database_ok()
+    pending = readiness.pending()
+    if not database or pending:
+        response.status_code = 503
+        return {"status": "starting", "database": database, "pending": pending}
+    return {"status": "ready", "database": database, "pending": []}
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return {"pets": pet_cache.stats(), "products": product_cache.stats()}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    return metrics.render_metrics()
+
 @app.get("/")
 async def root():
     return {"message": "PetBloom API v1.0.0"}
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, workers=settings.WEB_WORKERS)
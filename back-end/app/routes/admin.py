@@ -0,0 +1,50 @@
+from fastapi import APIRouter, Depends, File, UploadFile, HTTPException
+from fastapi.responses import StreamingResponse
+from app.services import catalog_io, facets, search_index, similarity, invalidation
+from app.services.listing_cache import bump_catalog_version
+from app.services.fbase_service import require_admin
+import io
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+EXPORT_MEDIA_TYPES = {"jsonl": "application/x-ndjson", "csv": "text/csv"}
+
+def import_format(filename: str, format: str = None) -> str:
+    fmt = (format or filename.rsplit(".", 1)[-1]).lower()
+    if fmt not in ("csv", "jsonl"):
+        raise HTTPException(status_code=400, detail="Format must be csv or jsonl")
+    return fmt
+
+@router.post("/import/{kind}")
+async def import_catalog(kind: str, file: UploadFile = File(...), format: str = None, start_after: int = 0):
+    try:
+        if kind not in catalog_io.IMPORT_SCHEMAS:
+            raise HTTPException(status_code=404, detail=f"Cannot import {kind}")
+        fmt = import_format(file.filename or "", format)
+        # The upload is already spooled to disk; wrap it so records are read lazily.
+        stream = io.TextIOWrapper(file.file, encoding="utf-8", newline="")
+        result = await catalog_io.import_catalog(kind, catalog_io.read_records(stream, fmt, kind), start_after)
+        # Bumped first so the rebuilds below read from the primary, not a replica that
+        # may not have the import yet.
+        bump_catalog_version()
+        await facets.rebuild()
+        await search_index.rebuild()
+        await similarity.build(force=True)
+        await invalidation.publish(facets_changed=True, search_rebuild=True)
+        return result
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/export/{kind}")
+async def export_catalog(kind: str, format: str = "jsonl"):
+    if kind not in catalog_io.EXPORT_FIELDS:
+        raise HTTPException(status_code=404, detail=f"Cannot export {kind}")
+    if format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="Format must be csv or jsonl")
+    return StreamingResponse(
+        catalog_io.export_catalog(kind, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{kind}.{format}"'}
+    )
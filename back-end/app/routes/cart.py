@@ -1,42 +1,97 @@
 from fastapi import APIRouter, HTTPException
 from typing import List
-from app.schemas import CartItemResponse, CartItemCreate
+from prisma.partials import CartItemWithCards
+from app.schemas import CartItemResponse, CartItemCreate, CartBatchCreate
 from app.services.prisma_client import prisma_client
+from app.services.expand import parse_expand
 
 router = APIRouter(prefix="/cart", tags=["cart"])
 
+CART_EXPANSIONS = {"product": {"product": True}, "pet": {"pet": True}}
+
 @router.get("/{user_id}", response_model=List[CartItemResponse])
-async def get_cart(user_id: str):
+async def get_cart(user_id: str, expand: str = None):
     try:
-        cart_items = await prisma_client.cartitem.find_many(
+        cart_items = await CartItemWithCards.prisma(prisma_client).find_many(
             where={"userId": user_id},
-            order={"createdAt": "desc"}
+            order={"createdAt": "desc"},
+            include=parse_expand(expand, CART_EXPANSIONS)
         )
         return cart_items
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+async def merge_into_cart(user_id: str, items: List[CartItemCreate]):
+    lines = {}
+    for item in items:
+        if bool(item.productId) == bool(item.petId):
+            raise HTTPException(status_code=400, detail="Each item needs exactly one of productId or petId")
+        if item.quantity < 1:
+            raise HTTPException(status_code=400, detail="Quantity must be at least 1")
+        key = ("productId", item.productId) if item.productId else ("petId", item.petId)
+        lines[key] = lines.get(key, 0) + item.quantity
+
+    product_ids = [value for field, value in lines if field == "productId"]
+    pet_ids = [value for field, value in lines if field == "petId"]
+    prices = {}
+    if product_ids:
+        products = await prisma_client.product.find_many(where={"id": {"in": product_ids}})
+        prices.update({("productId", p.id): p.price for p in products})
+    if pet_ids:
+        pets = await prisma_client.pet.find_many(where={"id": {"in": pet_ids}})
+        prices.update({("petId", p.id): p.price for p in pets})
+
+    missing = [value for key, value in lines if key not in prices]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Items not found: {', '.join(missing)}")
+
+    async with prisma_client.batch_() as batcher:
+        for (field, value), quantity in lines.items():
+            # A pet can only be in the cart once, so re-adding it never raises the quantity.
+            update = {"price": prices[(field, value)]}
+            if field == "productId":
+                update["quantity"] = {"increment": quantity}
+            batcher.cartitem.upsert(
+                where={f"userId_{field}": {"userId": user_id, field: value}},
+                data={
+                    "create": {
+                        "userId": user_id,
+                        field: value,
+                        "quantity": quantity if field == "productId" else 1,
+                        "price": prices[(field, value)]
+                    },
+                    "update": update
+                }
+            )
+
+@router.post("/batch", response_model=List[CartItemResponse])
+async def add_batch_to_cart(batch: CartBatchCreate, expand: str = None):
+    try:
+        include = parse_expand(expand, CART_EXPANSIONS)
+        await merge_into_cart(batch.userId, batch.items)
+        return await CartItemWithCards.prisma(prisma_client).find_many(
+            where={"userId": batch.userId},
+            order={"createdAt": "desc"},
+            include=include
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("", response_model=CartItemResponse)
 async def add_to_cart(item: CartItemCreate):
     try:
-        price = 0
-        if item.productId:
-            product = await prisma_client.product.find_unique(where={"id": item.productId})
-            price = product.price if product else 0
-        elif item.petId:
-            pet = await prisma_client.pet.find_unique(where={"id": item.petId})
-            price = pet.price if pet else 0
-        
-        cart_item = await prisma_client.cartitem.create(
-            data={
-                "userId": "temp_user",
-                "productId": item.productId,
-                "petId": item.petId,
-                "quantity": item.quantity,
-                "price": price
-            }
+        await merge_into_cart("temp_user", [item])
+        field, value = ("productId", item.productId) if item.productId else ("petId", item.petId)
+        cart_item = await prisma_client.cartitem.find_unique(
+            where={f"userId_{field}": {"userId": "temp_user", field: value}}
         )
         return cart_item
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -1,12 +1,20 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+from prisma.errors import UniqueViolationError
 from app.schemas import OrderResponse, OrderCreate
 from app.services.prisma_client import prisma_client
+from app.services.entity_cache import pet_cache, product_cache
+from app.services import search_index, similarity, invalidation, order_events, order_stats, fbase_service
+from app.services.expand import parse_expand
+from app.services.listing_cache import bump_catalog_version
 
 router = APIRouter(prefix="/orders", tags=["orders"])
 
+ORDER_EXPANSIONS = {"items": {"orderItems": {"include": {"product": True, "pet": True}}}}
+
 @router.get("/user/{user_id}", response_model=List[OrderResponse])
-async def get_user_orders(user_id: str, status: str = None):
+async def get_user_orders(user_id: str, status: str = None, expand: str = None):
     try:
         where_clause = {"userId": user_id}
         if status:
@@ -14,79 +22,217 @@ async def get_user_orders(user_id: str, status: str = None):
         
         orders = await prisma_client.order.find_many(
             where=where_clause,
-            order={"createdAt": "desc"}
+            order={"createdAt": "desc"},
+            include=parse_expand(expand, ORDER_EXPANSIONS)
         )
         return orders
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+async def _signed_in_user(claims: dict):
+    user = await prisma_client.user.find_unique(where={"firebaseUid": claims["uid"]})
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
+
+@router.post("/events/ticket")
+async def issue_event_ticket(current_user: dict = Depends(fbase_service.get_current_user)):
+    # The Firebase token stays in the Authorization header; only this short-lived,
+    # stream-only ticket goes in the EventSource URL, where logs and history record it.
+    user = await _signed_in_user(current_user)
+    return {"ticket": order_events.issue_ticket(user.id), "expiresIn": order_events.TICKET_TTL_SECONDS}
+
+@router.get("/events")
+async def stream_order_events(
+    ticket: str = None,
+    last_event_id: int = None,
+    authorization: str = Header(None),
+    last_event_id_header: str = Header(None, alias="Last-Event-ID")
+):
+    if authorization and authorization.lower().startswith("bearer "):
+        claims = await fbase_service.verify_fbase_token_async(authorization[7:].strip())
+        if not claims:
+            raise HTTPException(status_code=401, detail="Invalid token")
+        user_id = (await _signed_in_user(claims)).id
+    else:
+        user_id = order_events.read_ticket(ticket) if ticket else None
+        if not user_id:
+            raise HTTPException(status_code=401, detail="Invalid or expired ticket")
+
+    # Browsers resend the last id they saw in Last-Event-ID when they reconnect.
+    if last_event_id_header and last_event_id_header.isdigit():
+        last_event_id = int(last_event_id_header)
+    return StreamingResponse(
+        order_events.stream(user_id, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/{order_id}", response_model=OrderResponse)
-async def get_order(order_id: str):
+async def get_order(order_id: str, expand: str = None):
     try:
-        order = await prisma_client.order.find_unique(where={"id": order_id})
+        order = await prisma_client.order.find_unique(
+            where={"id": order_id},
+            include=parse_expand(expand, ORDER_EXPANSIONS)
+        )
         if not order:
             raise HTTPException(status_code=404, detail="Order not found")
         return order
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+async def reserve_stock(tx, cart_items):
+    quantities = {}
+    for item in cart_items:
+        if item.productId:
+            quantities[item.productId] = quantities.get(item.productId, 0) + item.quantity
+    if not quantities:
+        return
+
+    # One conditional UPDATE for every product in the cart; any short row means oversold.
+    values = []
+    params = []
+    for product_id, quantity in quantities.items():
+        values.append(f"(${len(params) + 1}, ${len(params) + 2}::int)")
+        params.extend([product_id, quantity])
+    updated = await tx.execute_raw(
+        'UPDATE "Product" AS p SET "stock" = p."stock" - v.qty, "updatedAt" = now() '
+        f'FROM (VALUES {", ".join(values)}) AS v(id, qty) '
+        'WHERE p."id" = v.id AND p."stock" >= v.qty',
+        *params
+    )
+    if updated != len(quantities):
+        raise HTTPException(status_code=409, detail="Insufficient stock for one or more products")
+
+async def reserve_pets(tx, cart_items):
+    pet_ids = list({item.petId for item in cart_items if item.petId})
+    if not pet_ids:
+        return
+    updated = await tx.pet.update_many(
+        where={"id": {"in": pet_ids}, "available": True},
+        data={"available": False}
+    )
+    if updated != len(pet_ids):
+        raise HTTPException(status_code=409, detail="One or more pets are no longer available")
+
 @router.post("/{user_id}", response_model=OrderResponse)
-async def create_order(user_id: str, order: OrderCreate):
+async def create_order(user_id: str, order: OrderCreate, idempotency_key: Optional[str] = Header(None)):
     try:
-        cart_items = await prisma_client.cartitem.find_many(
-            where={"userId": user_id}
-        )
-        
-        if not cart_items:
-            raise HTTPException(status_code=400, detail="Cart is empty")
-        
-        total_price = sum(item.price * item.quantity for item in cart_items)
-        
-        new_order = await prisma_client.order.create(
-            data={
-                "userId": user_id,
-                "status": "pending",
-                "totalPrice": total_price,
-                "shippingAddress": order.shippingAddress,
-                "deliveryOption": order.deliveryOption,
-                "pickupLocation": order.pickupLocation
-            }
-        )
-        
-        for cart_item in cart_items:
-            await prisma_client.orderitem.create(
+        if idempotency_key:
+            existing = await prisma_client.order.find_unique(where={"idempotencyKey": idempotency_key})
+            if existing and existing.userId == user_id:
+                return existing
+            if existing:
+                raise HTTPException(status_code=409, detail="Idempotency key already used")
+
+        async with prisma_client.tx() as tx:
+            # Locking the cart makes a concurrent checkout of it (a double-click without an
+            # Idempotency-Key) wait for this one, then find the cart already emptied.
+            await tx.query_raw('SELECT "id" FROM "CartItem" WHERE "userId" = $1 FOR UPDATE', user_id)
+            cart_items = await tx.cartitem.find_many(
+                where={"userId": user_id}
+            )
+            
+            if not cart_items:
+                raise HTTPException(status_code=400, detail="Cart is empty")
+            
+            total_price = sum(item.price * item.quantity for item in cart_items)
+            
+            new_order = await tx.order.create(
                 data={
-                    "orderId": new_order.id,
-                    "productId": cart_item.productId,
-                    "petId": cart_item.petId,
-                    "quantity": cart_item.quantity,
-                    "price": cart_item.price
+                    "userId": user_id,
+                    "status": "pending",
+                    "totalPrice": total_price,
+                    "shippingAddress": order.shippingAddress,
+                    "deliveryOption": order.deliveryOption,
+                    "pickupLocation": order.pickupLocation,
+                    "idempotencyKey": idempotency_key
                 }
             )
+            
+            await tx.orderitem.create_many(
+                data=[
+                    {
+                        "orderId": new_order.id,
+                        "productId": cart_item.productId,
+                        "petId": cart_item.petId,
+                        "quantity": cart_item.quantity,
+                        "price": cart_item.price
+                    }
+                    for cart_item in cart_items
+                ]
+            )
+            await reserve_stock(tx, cart_items)
+            await reserve_pets(tx, cart_items)
+            removed = await tx.cartitem.delete_many(where={"id": {"in": [item.id for item in cart_items]}})
+            if removed != len(cart_items):
+                raise HTTPException(status_code=409, detail="Cart changed during checkout, please retry")
+            await order_events.record(tx, new_order, "created")
+            await order_stats.record_order(tx, new_order, cart_items)
         
-        await prisma_client.cartitem.delete_many(where={"userId": user_id})
+        bump_catalog_version()
+        for cart_item in cart_items:
+            if cart_item.productId:
+                product_cache.invalidate(cart_item.productId)
+            if cart_item.petId:
+                pet_cache.invalidate(cart_item.petId)
+                search_index.discard("pet", cart_item.petId)
+                await similarity.discard("pet", cart_item.petId)
+        await invalidation.publish(
+            pets=[item.petId for item in cart_items if item.petId],
+            products=[item.productId for item in cart_items if item.productId]
+        )
         return new_order
+    except HTTPException:
+        raise
+    except UniqueViolationError as e:
+        if not idempotency_key:
+            raise HTTPException(status_code=400, detail=str(e))
+        # A concurrent retry with the same key committed first.
+        existing = await prisma_client.order.find_unique(where={"idempotencyKey": idempotency_key})
+        if existing and existing.userId == user_id:
+            return existing
+        raise HTTPException(status_code=409, detail="Idempotency key already used")
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.put("/{order_id}/status")
 async def update_order_status(order_id: str, status: str):
     try:
-        updated_order = await prisma_client.order.update(
-            where={"id": order_id},
-            data={"status": status}
-        )
+        async with prisma_client.tx() as tx:
+            current = await tx.order.find_unique(where={"id": order_id})
+            if not current:
+                raise HTTPException(status_code=404, detail="Order not found")
+            # Conditional on the status we read, so concurrent changes can't double count.
+            changed = await tx.order.update_many(
+                where={"id": order_id, "status": current.status},
+                data={"status": status}
+            )
+            if not changed:
+                raise HTTPException(status_code=409, detail="Order status changed concurrently, please retry")
+            updated_order = await tx.order.find_unique(where={"id": order_id})
+            await order_stats.record_status_change(tx, updated_order, current.status, status)
+            await order_events.record(tx, updated_order, "status")
         return updated_order
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.put("/{order_id}/tracking")
 async def update_tracking(order_id: str, tracking_number: str):
     try:
-        updated_order = await prisma_client.order.update(
-            where={"id": order_id},
-            data={"trackingNumber": tracking_number}
-        )
+        async with prisma_client.tx() as tx:
+            updated_order = await tx.order.update(
+                where={"id": order_id},
+                data={"trackingNumber": tracking_number}
+            )
+            if updated_order:
+                await order_events.record(tx, updated_order, "tracking")
         return updated_order
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
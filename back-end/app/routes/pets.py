@@ -1,49 +1,87 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
 from typing import List
-from app.schemas import PetResponse, PetCreate
+from app.schemas import PetResponse, PetCreate, PetPage
 from app.services.prisma_client import prisma_client
+from app.services.pagination import keyset_page
+from app.services import facets, search_index, invalidation, similarity, replica
+from app.services.serialization import FastJSONResponse, listing_payload, project, PET_FIELDS, PET_CARD_FIELDS
+from app.services.listing_cache import cached_listing, bump_catalog_version
+from app.services.entity_cache import pet_cache, entity_etag, etag_matches
 
 router = APIRouter(prefix="/pets", tags=["pets"])
 
+MAX_SIMILAR = 50
+
 @router.get("/species/list")
-async def get_species_list():
-    try:
-        pets = await prisma_client.pet.find_many(select={"species": True})
-        species = list(set([pet.species for pet in pets]))
-        return species
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+async def get_species_list(request: Request, counts: bool = False):
+    return await cached_listing(request, lambda: facets.ranked(facets.species, counts))
 
 @router.get("/breeds/{species}")
-async def get_breeds_by_species(species: str):
-    try:
-        pets = await prisma_client.pet.find_many(where={"species": species}, select={"breed": True})
-        breeds = list(set([pet.breed for pet in pets]))
-        return breeds
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+async def get_breeds_by_species(species: str, request: Request, counts: bool = False):
+    return await cached_listing(request, lambda: facets.ranked(facets.breeds_for(species), counts))
 
-@router.get("")
-async def get_pets(skip: int = 0, limit: int = 20, species: str = None, available: bool = True):
-    try:
+@router.get("", response_model=PetPage)
+async def get_pets(request: Request, skip: int = 0, limit: int = 20, species: str = None, available: bool = True,
+                   paginate: str = "offset", cursor: str = None, include_total: bool = False):
+    async def build():
         where_clause = {"available": available}
         if species:
             where_clause["species"] = species
         
-        pets = await prisma_client.pet.find_many(where=where_clause, skip=skip, take=limit, order={"createdAt": "desc"})
-        total = await prisma_client.pet.count(where=where_clause)
+        async def query(db):
+            if cursor or paginate == "cursor":
+                page = await keyset_page(db.pet, where_clause, limit, cursor, include_total)
+                return listing_payload(page, PET_FIELDS)
+            
+            pets = await db.pet.find_many(where=where_clause, skip=skip, take=limit, order={"createdAt": "desc"})
+            total = await db.pet.count(where=where_clause)
+            
+            return listing_payload({"data": pets, "total": total}, PET_FIELDS)
         
-        return {"data": pets, "total": total}
+        return await replica.read(query)
+    
+    try:
+        return await cached_listing(request, build)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/{pet_id}", response_model=PetResponse)
-async def get_pet(pet_id: str):
+async def get_pet(pet_id: str, request: Request):
     try:
-        pet = await prisma_client.pet.find_unique(where={"id": pet_id})
+        pet = pet_cache.get(pet_id)
+        if pet is None:
+            generation = pet_cache.generation
+            pet = await replica.read(lambda db: db.pet.find_unique(where={"id": pet_id}))
+            if not pet:
+                raise HTTPException(status_code=404, detail="Pet not found")
+            pet_cache.set(pet_id, pet, generation)
+        
+        etag = entity_etag(pet)
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        return FastJSONResponse(project(pet, PET_FIELDS), headers={"ETag": etag, "Cache-Control": "no-cache"})
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/{pet_id}/similar")
+async def get_similar_pets(pet_id: str, request: Request, limit: int = 10):
+    async def build():
+        pet = pet_cache.get(pet_id) or await replica.read(lambda db: db.pet.find_unique(where={"id": pet_id}))
         if not pet:
             raise HTTPException(status_code=404, detail="Pet not found")
-        return pet
+        matches = similarity.similar("pet", pet, max(1, min(limit, MAX_SIMILAR)))
+        ids = [row_id for row_id, _ in matches]
+        rows = {row.id: row for row in await replica.read(lambda db: db.pet.find_many(where={"id": {"in": ids}}))}
+        return [{**project(rows[row_id], PET_CARD_FIELDS), "score": round(score, 4)} for row_id, score in matches if row_id in rows]
+
+    try:
+        return await cached_listing(request, build)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -51,6 +89,11 @@ async def get_pet(pet_id: str):
 async def create_pet(pet: PetCreate):
     try:
         new_pet = await prisma_client.pet.create(data=pet.dict())
+        facets.add_pet(new_pet)
+        bump_catalog_version()
+        search_index.upsert("pet", new_pet)
+        await similarity.upsert("pet", new_pet)
+        await invalidation.publish(pets=[new_pet.id], facets_changed=True)
         return new_pet
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -58,7 +101,17 @@ async def create_pet(pet: PetCreate):
 @router.put("/{pet_id}", response_model=PetResponse)
 async def update_pet(pet_id: str, pet_update: PetCreate):
     try:
+        old_pet = await prisma_client.pet.find_unique(where={"id": pet_id})
         updated_pet = await prisma_client.pet.update(where={"id": pet_id}, data=pet_update.dict())
+        pet_cache.invalidate(pet_id)
+        bump_catalog_version()
+        if old_pet:
+            facets.remove_pet(old_pet)
+        if updated_pet:
+            facets.add_pet(updated_pet)
+            search_index.upsert("pet", updated_pet)
+            await similarity.upsert("pet", updated_pet)
+        await invalidation.publish(pets=[pet_id], facets_changed=True)
         return updated_pet
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -66,7 +119,14 @@ async def update_pet(pet_id: str, pet_update: PetCreate):
 @router.delete("/{pet_id}")
 async def delete_pet(pet_id: str):
     try:
-        await prisma_client.pet.delete(where={"id": pet_id})
+        deleted_pet = await prisma_client.pet.delete(where={"id": pet_id})
+        pet_cache.invalidate(pet_id)
+        bump_catalog_version()
+        if deleted_pet:
+            facets.remove_pet(deleted_pet)
+        search_index.discard("pet", pet_id)
+        await similarity.discard("pet", pet_id)
+        await invalidation.publish(pets=[pet_id], facets_changed=True)
         return {"message": "Pet deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -1,51 +1,89 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
 from typing import List
-from app.schemas import ProductResponse, ProductCreate
+from app.schemas import ProductResponse, ProductCreate, ProductPage
 from app.services.prisma_client import prisma_client
+from app.services.pagination import keyset_page
+from app.services import facets, search_index, invalidation, similarity, replica
+from app.services.serialization import FastJSONResponse, listing_payload, project, PRODUCT_FIELDS, PRODUCT_CARD_FIELDS
+from app.services.listing_cache import cached_listing, bump_catalog_version
+from app.services.entity_cache import product_cache, entity_etag, etag_matches
 
 router = APIRouter(prefix="/products", tags=["products"])
 
+MAX_SIMILAR = 50
+
 @router.get("/categories/list")
-async def get_categories_list():
-    try:
-        products = await prisma_client.product.find_many(select={"category": True})
-        categories = list(set([p.category for p in products]))
-        return categories
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+async def get_categories_list(request: Request, counts: bool = False):
+    return await cached_listing(request, lambda: facets.ranked(facets.categories, counts))
 
 @router.get("/brands/list")
-async def get_brands_list():
-    try:
-        products = await prisma_client.product.find_many(select={"brand": True})
-        brands = list(set([p.brand for p in products if p.brand]))
-        return brands
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+async def get_brands_list(request: Request, counts: bool = False):
+    return await cached_listing(request, lambda: facets.ranked(facets.brands, counts))
 
-@router.get("")
-async def get_products(skip: int = 0, limit: int = 20, category: str = None, petType: str = None):
-    try:
+@router.get("", response_model=ProductPage)
+async def get_products(request: Request, skip: int = 0, limit: int = 20, category: str = None, petType: str = None,
+                       paginate: str = "offset", cursor: str = None, include_total: bool = False):
+    async def build():
         where_clause = {}
         if category:
             where_clause["category"] = category
         if petType:
             where_clause["petType"] = petType
         
-        products = await prisma_client.product.find_many(where=where_clause, skip=skip, take=limit, order={"createdAt": "desc"})
-        total = await prisma_client.product.count(where=where_clause)
+        async def query(db):
+            if cursor or paginate == "cursor":
+                page = await keyset_page(db.product, where_clause, limit, cursor, include_total)
+                return listing_payload(page, PRODUCT_FIELDS)
+            
+            products = await db.product.find_many(where=where_clause, skip=skip, take=limit, order={"createdAt": "desc"})
+            total = await db.product.count(where=where_clause)
+            
+            return listing_payload({"data": products, "total": total}, PRODUCT_FIELDS)
         
-        return {"data": products, "total": total}
+        return await replica.read(query)
+    
+    try:
+        return await cached_listing(request, build)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/{product_id}", response_model=ProductResponse)
-async def get_product(product_id: str):
+async def get_product(product_id: str, request: Request):
     try:
-        product = await prisma_client.product.find_unique(where={"id": product_id})
+        product = product_cache.get(product_id)
+        if product is None:
+            generation = product_cache.generation
+            product = await replica.read(lambda db: db.product.find_unique(where={"id": product_id}))
+            if not product:
+                raise HTTPException(status_code=404, detail="Product not found")
+            product_cache.set(product_id, product, generation)
+        
+        etag = entity_etag(product)
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        return FastJSONResponse(project(product, PRODUCT_FIELDS), headers={"ETag": etag, "Cache-Control": "no-cache"})
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/{product_id}/similar")
+async def get_similar_products(product_id: str, request: Request, limit: int = 10):
+    async def build():
+        product = product_cache.get(product_id) or await replica.read(lambda db: db.product.find_unique(where={"id": product_id}))
         if not product:
             raise HTTPException(status_code=404, detail="Product not found")
-        return product
+        matches = similarity.similar("product", product, max(1, min(limit, MAX_SIMILAR)))
+        ids = [row_id for row_id, _ in matches]
+        rows = {row.id: row for row in await replica.read(lambda db: db.product.find_many(where={"id": {"in": ids}}))}
+        return [{**project(rows[row_id], PRODUCT_CARD_FIELDS), "score": round(score, 4)} for row_id, score in matches if row_id in rows]
+
+    try:
+        return await cached_listing(request, build)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -53,6 +91,11 @@ async def get_product(product_id: str):
 async def create_product(product: ProductCreate):
     try:
         new_product = await prisma_client.product.create(data=product.dict())
+        facets.add_product(new_product)
+        bump_catalog_version()
+        search_index.upsert("product", new_product)
+        await similarity.upsert("product", new_product)
+        await invalidation.publish(products=[new_product.id], facets_changed=True)
         return new_product
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -60,7 +103,17 @@ async def create_product(product: ProductCreate):
 @router.put("/{product_id}", response_model=ProductResponse)
 async def update_product(product_id: str, product_update: ProductCreate):
     try:
+        old_product = await prisma_client.product.find_unique(where={"id": product_id})
         updated_product = await prisma_client.product.update(where={"id": product_id}, data=product_update.dict())
+        product_cache.invalidate(product_id)
+        bump_catalog_version()
+        if old_product:
+            facets.remove_product(old_product)
+        if updated_product:
+            facets.add_product(updated_product)
+            search_index.upsert("product", updated_product)
+            await similarity.upsert("product", updated_product)
+        await invalidation.publish(products=[product_id], facets_changed=True)
         return updated_product
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -68,7 +121,14 @@ async def update_product(product_id: str, product_update: ProductCreate):
 @router.delete("/{product_id}")
 async def delete_product(product_id: str):
     try:
-        await prisma_client.product.delete(where={"id": product_id})
+        deleted_product = await prisma_client.product.delete(where={"id": product_id})
+        product_cache.invalidate(product_id)
+        bump_catalog_version()
+        if deleted_product:
+            facets.remove_product(deleted_product)
+        search_index.discard("product", product_id)
+        await similarity.discard("product", product_id)
+        await invalidation.publish(products=[product_id], facets_changed=True)
         return {"message": "Product deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
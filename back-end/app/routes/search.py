@@ -0,0 +1,83 @@
+from fastapi import APIRouter, HTTPException, Request
+from app.config import get_settings
+from app.services.pagination import encode_keys, decode_keys
+from app.services import search_index, replica
+from app.services.listing_cache import cached_listing
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+settings = get_settings()
+
+SEARCH_KINDS = {"all": {"pet", "product"}, "pets": {"pet"}, "products": {"product"}}
+MAX_LIMIT = 100
+INDEX_RETRY_SECONDS = 5
+
+PET_BRANCH = '''
+    SELECT 'pet' AS kind, p."id", p."name", p."price", p."images"[1] AS image, p."breed" AS subtitle,
+           round((ts_rank_cd(p."searchVector", q) + similarity(p."name", $2))::numeric, 6)::float8 AS score
+    FROM "Pet" p, to_tsquery('simple', $1) q
+    WHERE p."available" AND (p."searchVector" @@ q OR p."name" % $2)
+'''
+
+PRODUCT_BRANCH = '''
+    SELECT 'product' AS kind, p."id", p."name", p."price", p."images"[1] AS image, p."brand" AS subtitle,
+           round((ts_rank_cd(p."searchVector", q) + similarity(p."name", $2))::numeric, 6)::float8 AS score
+    FROM "Product" p, to_tsquery('simple', $1) q
+    WHERE p."searchVector" @@ q OR p."name" % $2
+'''
+
+async def postgres_search(query: str, kinds: set, limit: int, after=None) -> list:
+    tokens = search_index.tokenize(query)
+    if not tokens:
+        return []
+    # Every token is matched as a prefix; the trigram clause covers typos in names.
+    tsquery = " & ".join(f"{token}:*" for token in tokens)
+    branches = []
+    if "pet" in kinds:
+        branches.append(PET_BRANCH)
+    if "product" in kinds:
+        branches.append(PRODUCT_BRANCH)
+    after_score, after_id = after if after else (None, None)
+    return await replica.read(lambda db: db.query_raw(
+        f'SELECT * FROM ({" UNION ALL ".join(branches)}) results '
+        'WHERE $3::float8 IS NULL OR (score, id) < ($3::float8, $4::text) '
+        'ORDER BY score DESC, id DESC LIMIT $5',
+        tsquery, " ".join(tokens), after_score, after_id, limit
+    ))
+
+@router.get("")
+async def search(request: Request, q: str, type: str = "all", limit: int = 20, cursor: str = None):
+    async def build():
+        kinds = SEARCH_KINDS.get(type)
+        if kinds is None:
+            raise HTTPException(status_code=400, detail=f"Unknown search type: {type}")
+        page_size = max(1, min(limit, MAX_LIMIT))
+        after = decode_keys(cursor) if cursor else None
+
+        results = None
+        if settings.SEARCH_BACKEND == "postgres":
+            try:
+                results = await postgres_search(q, kinds, page_size + 1, after)
+            except Exception as e:
+                print(f"Postgres search failed, using in-process index: {e}")
+        if results is None:
+            if not search_index.index.loaded:
+                # Loading reads both catalogs, so it never runs inside a request.
+                search_index.load_in_background()
+                raise HTTPException(
+                    status_code=503, detail="Search is warming up, please retry",
+                    headers={"Retry-After": str(INDEX_RETRY_SECONDS)}
+                )
+            results = search_index.index.search(q, kinds, page_size + 1, after)
+
+        has_more = len(results) > page_size
+        results = results[:page_size]
+        next_cursor = encode_keys(results[-1]["score"], results[-1]["id"]) if has_more else None
+        return {"data": results, "next_cursor": next_cursor}
+
+    try:
+        return await cached_listing(request, build)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
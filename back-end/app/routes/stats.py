@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta, timezone
+from fastapi import APIRouter, Depends, HTTPException
+from app.services.prisma_client import prisma_client
+from app.services.fbase_service import get_current_user, is_admin
+
+router = APIRouter(prefix="/stats", tags=["stats"])
+
+MAX_DAYS = 366
+MAX_LIMIT = 100
+TOP_METRICS = {"revenue", "units"}
+
+def window_start(days: int) -> str:
+    days = max(1, min(days, MAX_DAYS))
+    return (datetime.now(timezone.utc).date() - timedelta(days=days - 1)).isoformat()
+
+@router.get("/users/{user_id}")
+async def get_user_stats(user_id: str, current_user: dict = Depends(get_current_user)):
+    try:
+        # A user's spending is visible to that user and to admins only.
+        if not is_admin(current_user):
+            user = await prisma_client.user.find_unique(where={"firebaseUid": current_user["uid"]})
+            if not user or user.id != user_id:
+                raise HTTPException(status_code=403, detail="Not allowed to view this user's stats")
+        stats = await prisma_client.userorderstats.find_unique(where={"userId": user_id})
+        if not stats:
+            return {"userId": user_id, "orderCount": 0, "totalSpent": 0.0, "lastOrderAt": None}
+        return {"userId": user_id, "orderCount": stats.orderCount, "totalSpent": stats.totalSpent, "lastOrderAt": stats.lastOrderAt}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/orders/status")
+async def get_status_counts():
+    try:
+        rows = await prisma_client.orderstatuscount.find_many(where={"count": {"gt": 0}}, order={"status": "asc"})
+        return {row.status: row.count for row in rows}
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/products/top")
+async def get_top_products(days: int = 30, limit: int = 10, metric: str = "revenue"):
+    try:
+        if metric not in TOP_METRICS:
+            raise HTTPException(status_code=400, detail="metric must be revenue or units")
+        # Reads one row per product per day in the window, independent of order history.
+        rows = await prisma_client.query_raw(
+            'SELECT "productId", sum("units")::int AS units, sum("revenue")::float8 AS revenue '
+            'FROM "ProductDailySales" WHERE "day" >= $1::date '
+            f'GROUP BY "productId" HAVING sum("units") > 0 ORDER BY {metric} DESC, "productId" LIMIT $2',
+            window_start(days), max(1, min(limit, MAX_LIMIT))
+        )
+        products = await prisma_client.product.find_many(where={"id": {"in": [row["productId"] for row in rows]}})
+        names = {product.id: product.name for product in products}
+        return [{**row, "name": names.get(row["productId"])} for row in rows]
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/products/{product_id}/daily")
+async def get_product_daily_sales(product_id: str, days: int = 30):
+    try:
+        start = datetime.fromisoformat(window_start(days)).replace(tzinfo=timezone.utc)
+        rows = await prisma_client.productdailysales.find_many(
+            where={"productId": product_id, "day": {"gte": start}},
+            order={"day": "asc"}
+        )
+        return [{"day": row.day.date().isoformat(), "units": row.units, "revenue": row.revenue} for row in rows]
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
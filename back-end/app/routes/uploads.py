@@ -1,7 +1,11 @@
-from fastapi import APIRouter, File, UploadFile, HTTPException
+from fastapi import APIRouter, Depends, File, UploadFile, HTTPException, Request
+from starlette.concurrency import run_in_threadpool
+import asyncio
 import os
-from datetime import datetime
-import uuid
+from app.services.storage import stream_to_disk, stream_chunks_to_disk, store_content_addressed, release_upload, UploadTooLarge
+from app.services.media import MediaResponse
+from app.services.fbase_service import get_current_user
+from app.services import images
 
 router = APIRouter(prefix="/uploads", tags=["uploads"])
 
@@ -10,9 +14,24 @@ os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 ALLOWED_EXTENSIONS = {"jpg", "jpeg", "png", "gif", "webp"}
 MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
+VIDEO_EXTENSIONS = {"mp4", "webm", "mov", "m4v"}
+MAX_VIDEO_SIZE = 200 * 1024 * 1024  # 200MB
+# Video uploads skip the admission slots (they would hold one for minutes), so they
+# get their own small limit per worker.
+MAX_CONCURRENT_VIDEO_UPLOADS = 2
+VIDEO_RETRY_SECONDS = 5
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
 
-def allowed_file(filename: str) -> bool:
-    return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
+_video_slots = asyncio.Semaphore(MAX_CONCURRENT_VIDEO_UPLOADS)
+
+def allowed_file(filename: str, extensions=ALLOWED_EXTENSIONS) -> bool:
+    return "." in filename and filename.rsplit(".", 1)[1].lower() in extensions
+
+def safe_upload_path(filename: str) -> str:
+    file_path = os.path.join(UPLOAD_DIR, filename)
+    if not os.path.abspath(file_path).startswith(os.path.abspath(UPLOAD_DIR) + os.sep):
+        raise HTTPException(status_code=400, detail="Invalid filename")
+    return file_path
 
 @router.post("/image")
 async def upload_image(file: UploadFile = File(...)):
@@ -27,21 +46,28 @@ async def upload_image(file: UploadFile = File(...)):
                 detail=f"File type not allowed. Allowed types: {', '.join(ALLOWED_EXTENSIONS)}"
             )
         
-        file_content = await file.read()
-        if len(file_content) > MAX_FILE_SIZE:
+        file_ext = file.filename.rsplit(".", 1)[1].lower()
+        try:
+            temp_path, digest, size = await stream_to_disk(file, UPLOAD_DIR, MAX_FILE_SIZE)
+        except UploadTooLarge:
             raise HTTPException(status_code=400, detail="File size exceeds 5MB limit")
         
-        file_ext = file.filename.rsplit(".", 1)[1].lower()
-        unique_filename = f"{uuid.uuid4()}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{file_ext}"
-        file_path = os.path.join(UPLOAD_DIR, unique_filename)
+        try:
+            stored_filename = await store_content_addressed(temp_path, digest, file_ext, size, UPLOAD_DIR)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
         
-        with open(file_path, "wb") as f:
-            f.write(file_content)
+        images.schedule_derivatives(UPLOAD_DIR, stored_filename)
         
         return {
-            "filename": unique_filename,
-            "url": f"/uploads/{unique_filename}",
-            "size": len(file_content)
+            "filename": stored_filename,
+            "url": f"/uploads/{stored_filename}",
+            "size": size,
+            "variants": {
+                name: f"/api/v1/uploads/{stored_filename}?w={width}&format=webp"
+                for name, width in images.VARIANT_WIDTHS.items()
+            }
         }
     
     except HTTPException:
@@ -49,20 +75,99 @@ async def upload_image(file: UploadFile = File(...)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
+@router.post("/video")
+async def upload_video(request: Request, filename: str, current_user: dict = Depends(get_current_user)):
+    # The file is the raw request body rather than a multipart field, so it streams to
+    # disk as it arrives instead of being spooled by the form parser first.
+    try:
+        if not allowed_file(filename, VIDEO_EXTENSIONS):
+            raise HTTPException(
+                status_code=400,
+                detail=f"File type not allowed. Allowed types: {', '.join(sorted(VIDEO_EXTENSIONS))}"
+            )
+        try:
+            content_length = int(request.headers.get("content-length") or 0)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid Content-Length")
+        if content_length > MAX_VIDEO_SIZE:
+            raise HTTPException(status_code=400, detail="File size exceeds 200MB limit")
+        if _video_slots.locked():
+            raise HTTPException(
+                status_code=503, detail="Too many uploads in progress, please retry",
+                headers={"Retry-After": str(VIDEO_RETRY_SECONDS)}
+            )
+        
+        file_ext = filename.rsplit(".", 1)[1].lower()
+        async with _video_slots:
+            try:
+                temp_path, digest, size = await stream_chunks_to_disk(request.stream(), UPLOAD_DIR, MAX_VIDEO_SIZE)
+            except UploadTooLarge:
+                raise HTTPException(status_code=400, detail="File size exceeds 200MB limit")
+        if not size:
+            os.remove(temp_path)
+            raise HTTPException(status_code=400, detail="Empty upload")
+        
+        try:
+            stored_filename = await store_content_addressed(temp_path, digest, file_ext, size, UPLOAD_DIR)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        
+        return {"filename": stored_filename, "url": f"/api/v1/uploads/{stored_filename}", "size": size}
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
+
+@router.api_route("/{filename}", methods=["GET", "HEAD"])
+async def get_image(filename: str, request: Request, w: int = None, format: str = None):
+    
+    try:
+        file_path = safe_upload_path(filename)
+        if not os.path.isfile(file_path) or not allowed_file(filename, ALLOWED_EXTENSIONS | VIDEO_EXTENSIONS):
+            raise HTTPException(status_code=404, detail="File not found")
+        
+        if allowed_file(filename, VIDEO_EXTENSIONS):
+            return MediaResponse(file_path, request, headers={"Cache-Control": IMMUTABLE_CACHE})
+        
+        fmt = (format or filename.rsplit(".", 1)[1]).lower()
+        vary = None
+        if fmt == "auto":
+            fmt = "webp" if "image/webp" in request.headers.get("accept", "") else filename.rsplit(".", 1)[1].lower()
+            vary = "Accept"
+        if fmt not in images.VARIANT_FORMATS:
+            raise HTTPException(status_code=400, detail=f"Unsupported format: {fmt}")
+        
+        if w is None and fmt == filename.rsplit(".", 1)[1].lower():
+            path = file_path
+        else:
+            width = images.snap_width(w or max(images.VARIANT_WIDTHS.values()))
+            path = await images.render_variant(UPLOAD_DIR, filename, width, fmt)
+        
+        headers = {"Cache-Control": IMMUTABLE_CACHE}
+        if vary:
+            headers["Vary"] = vary
+        return MediaResponse(path, request, headers=headers)
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Image processing failed: {str(e)}")
+
 @router.delete("/{filename}")
 async def delete_image(filename: str):
     
     try:
-        file_path = os.path.join(UPLOAD_DIR, filename)
-        
-        if not os.path.abspath(file_path).startswith(os.path.abspath(UPLOAD_DIR)):
-            raise HTTPException(status_code=400, detail="Invalid filename")
+        file_path = safe_upload_path(filename)
         
         if not os.path.exists(file_path):
             raise HTTPException(status_code=404, detail="File not found")
         
-        os.remove(file_path)
-        return {"message": "Image deleted successfully"}
+        references = await release_upload(filename, UPLOAD_DIR)
+        if references == 0:
+            await run_in_threadpool(images.remove_variants, UPLOAD_DIR, filename)
+        return {"message": "Image deleted successfully", "references": references}
     
     except HTTPException:
         raise
@@ -1,18 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, HTTPException, status
 from app.schemas import UserResponse, UserUpdate
-from app.services.fbase_service import verify_fbase_token
 from app.services.prisma_client import prisma_client
 
 router = APIRouter(prefix="/users", tags=["users"])
 
-def get_current_user(token: str = Depends(lambda: None)):
-    if not token:
-        raise HTTPException(status_code=401, detail="No token provided")
-    decoded = verify_fbase_token(token)
-    if not decoded:
-        raise HTTPException(status_code=401, detail="Invalid token")
-    return decoded
-
 @router.post("/register")
 async def register(email: str, name: str, firebaseUid: str):
     try:
@@ -1,50 +1,112 @@
 from fastapi import APIRouter, HTTPException
 from typing import List
-from app.schemas import WishlistResponse, WishlistCreate
+from prisma.errors import UniqueViolationError
+from prisma.partials import WishlistWithCards
+from app.schemas import WishlistResponse, WishlistCreate, WishlistBatch
 from app.services.prisma_client import prisma_client
+from app.services.expand import parse_expand
+from app.services import wishlist_membership
 
 router = APIRouter(prefix="/wishlist", tags=["wishlist"])
 
+WISHLIST_EXPANSIONS = {"product": {"product": True}, "pet": {"pet": True}}
+MAX_CONTAINS_IDS = 200
+
+def item_key(item: WishlistCreate):
+    if bool(item.productId) == bool(item.petId):
+        raise HTTPException(status_code=400, detail="Each item needs exactly one of productId or petId")
+    return ("productId", item.productId) if item.productId else ("petId", item.petId)
+
 @router.get("/{user_id}", response_model=List[WishlistResponse])
-async def get_wishlist(user_id: str):
+async def get_wishlist(user_id: str, expand: str = None):
     try:
-        wishlist = await prisma_client.wishlist.find_many(
+        wishlist = await WishlistWithCards.prisma(prisma_client).find_many(
             where={"userId": user_id},
-            order={"addedAt": "desc"}
+            order={"addedAt": "desc"},
+            include=parse_expand(expand, WISHLIST_EXPANSIONS)
         )
         return wishlist
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/{user_id}/contains")
+async def wishlist_contains(user_id: str, ids: str):
+    try:
+        requested = list(dict.fromkeys(item_id for item_id in ids.split(",") if item_id))
+        if len(requested) > MAX_CONTAINS_IDS:
+            raise HTTPException(status_code=400, detail=f"At most {MAX_CONTAINS_IDS} ids per request")
+        members = await wishlist_membership.members(user_id)
+        return {item_id: item_id in members for item_id in requested}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("", response_model=WishlistResponse)
 async def add_to_wishlist(item: WishlistCreate):
     try:
-        existing = await prisma_client.wishlist.find_first(
-            where={
-                "userId": "temp_user",
-                "productId": item.productId,
-                "petId": item.petId
-            }
-        )
-        
-        if existing:
-            raise HTTPException(status_code=400, detail="Item already in wishlist")
-        
-        wishlist_item = await prisma_client.wishlist.create(
-            data={
-                "userId": "temp_user",
-                "productId": item.productId,
-                "petId": item.petId
-            }
-        )
+        field, value = item_key(item)
+        try:
+            wishlist_item = await prisma_client.wishlist.create(data={"userId": "temp_user", field: value})
+        except UniqueViolationError:
+            # Adding an item that is already there returns the existing entry.
+            return await prisma_client.wishlist.find_unique(
+                where={f"userId_{field}": {"userId": "temp_user", field: value}}
+            )
+        await wishlist_membership.added("temp_user", [value])
         return wishlist_item
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/batch", response_model=List[WishlistResponse])
+async def add_batch_to_wishlist(batch: WishlistBatch, expand: str = None):
+    try:
+        include = parse_expand(expand, WISHLIST_EXPANSIONS)
+        keys = list(dict.fromkeys(item_key(item) for item in batch.items))
+        if keys:
+            await prisma_client.wishlist.create_many(
+                data=[{"userId": batch.userId, field: value} for field, value in keys],
+                skip_duplicates=True
+            )
+            await wishlist_membership.added(batch.userId, [value for _, value in keys])
+        return await WishlistWithCards.prisma(prisma_client).find_many(
+            where={"userId": batch.userId},
+            order={"addedAt": "desc"},
+            include=include
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/batch/remove")
+async def remove_batch_from_wishlist(batch: WishlistBatch):
+    try:
+        keys = [item_key(item) for item in batch.items]
+        product_ids = [value for field, value in keys if field == "productId"]
+        pet_ids = [value for field, value in keys if field == "petId"]
+        removed = 0
+        if keys:
+            removed = await prisma_client.wishlist.delete_many(
+                where={"userId": batch.userId, "OR": [{"productId": {"in": product_ids}}, {"petId": {"in": pet_ids}}]}
+            )
+            await wishlist_membership.removed(batch.userId, product_ids + pet_ids)
+        return {"removed": removed}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.delete("/{wishlist_id}")
 async def remove_from_wishlist(wishlist_id: str):
     try:
-        await prisma_client.wishlist.delete(where={"id": wishlist_id})
+        removed = await prisma_client.wishlist.delete(where={"id": wishlist_id})
+        if removed:
+            await wishlist_membership.removed(removed.userId, [removed.productId or removed.petId])
         return {"message": "Item removed from wishlist"}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -64,6 +64,11 @@ class PetResponse(PetCreate):
     class Config:
         from_attributes = True
 
+class PetPage(BaseModel):
+    data: List[PetResponse]
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
+
 class ProductCreate(BaseModel):
     name: str
     description: Optional[str] = None
@@ -83,11 +88,46 @@ class ProductResponse(ProductCreate):
     class Config:
         from_attributes = True
 
+class ProductPage(BaseModel):
+    data: List[ProductResponse]
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
+
+class PetCard(BaseModel):
+    id: str
+    name: str
+    species: str
+    breed: str
+    age: int
+    price: float
+    images: List[str] = []
+    available: bool = True
+
+    class Config:
+        from_attributes = True
+
+class ProductCard(BaseModel):
+    id: str
+    name: str
+    category: str
+    petType: Optional[str] = None
+    brand: Optional[str] = None
+    price: float
+    images: List[str] = []
+    stock: int = 0
+
+    class Config:
+        from_attributes = True
+
 class CartItemCreate(BaseModel):
     productId: Optional[str] = None
     petId: Optional[str] = None
     quantity: int = 1
 
+class CartBatchCreate(BaseModel):
+    userId: str
+    items: List[CartItemCreate]
+
 class CartItemResponse(BaseModel):
     id: str
     userId: str
@@ -97,6 +137,8 @@ class CartItemResponse(BaseModel):
     price: float
     createdAt: datetime
     updatedAt: datetime
+    product: Optional[ProductCard] = None
+    pet: Optional[PetCard] = None
 
     class Config:
         from_attributes = True
@@ -105,12 +147,18 @@ class WishlistCreate(BaseModel):
     productId: Optional[str] = None
     petId: Optional[str] = None
 
+class WishlistBatch(BaseModel):
+    userId: str
+    items: List[WishlistCreate]
+
 class WishlistResponse(BaseModel):
     id: str
     userId: str
     productId: Optional[str] = None
     petId: Optional[str] = None
     addedAt: datetime
+    product: Optional[ProductCard] = None
+    pet: Optional[PetCard] = None
 
     class Config:
         from_attributes = True
@@ -120,6 +168,18 @@ class OrderItemCreate(BaseModel):
     petId: Optional[str] = None
     quantity: int
 
+class OrderItemResponse(BaseModel):
+    id: str
+    productId: Optional[str] = None
+    petId: Optional[str] = None
+    quantity: int
+    price: float
+    product: Optional[ProductCard] = None
+    pet: Optional[PetCard] = None
+
+    class Config:
+        from_attributes = True
+
 class OrderCreate(BaseModel):
     shippingAddress: str
     deliveryOption: str
@@ -136,6 +196,7 @@ class OrderResponse(BaseModel):
     trackingNumber: Optional[str] = None
     createdAt: datetime
     updatedAt: datetime
+    orderItems: Optional[List[OrderItemResponse]] = None
 
     class Config:
         from_attributes = True
@@ -0,0 +1,192 @@
+import asyncio
+import math
+import os
+import re
+import time
+from collections import OrderedDict, deque
+from fastapi.responses import JSONResponse
+from app.config import get_settings
+from app.services.metrics import Counter, Gauge
+from app.services.prisma_client import pool_size
+from app.services import readiness
+
+settings = get_settings()
+
+# Route classes, highest priority first. Under overload checkout keeps its place in the
+# queue while browsing is shed.
+CHECKOUT, WRITE, UPLOAD, BROWSE = "checkout", "write", "upload", "browse"
+PRIORITY = {CHECKOUT: 0, WRITE: 1, UPLOAD: 1, BROWSE: 2}
+# Share of ADMISSION_QUEUE_LIMIT each class may wait behind before it is turned away.
+QUEUE_SHARE = {CHECKOUT: 4, WRITE: 2, UPLOAD: 1, BROWSE: 1}
+# Token buckets per client and class: (refill per second, burst).
+RATE_LIMITS = {CHECKOUT: (1, 5), WRITE: (5, 20), UPLOAD: (0.5, 5), BROWSE: (20, 60)}
+MAX_BUCKETS = 100_000
+
+CHECKOUT_PATH = re.compile(r"^/api/v1/orders/[^/]+$")
+EXEMPT_PATHS = {"/", "/health", "/health/live", "/health/ready", "/metrics", "/cache/stats"}
+NOT_READY_RETRY_SECONDS = 2
+# Long-lived streams and file transfers are rate limited but never hold a concurrency
+# slot for their whole duration. Video uploads are capped by their own limit in
+# routes/uploads.py instead.
+STREAM_PATHS = {"/api/v1/orders/events", "/api/v1/uploads/video"}
+MEDIA_PREFIX = "/api/v1/uploads/"
+
+queue_depth = Gauge("admission_queue_depth", "Requests waiting for a concurrency slot.", ("class",))
+active_requests = Gauge("admission_active_requests", "Requests holding a concurrency slot.")
+rejections = Counter("admission_rejections_total", "Requests turned away by admission control.", ("class", "reason"))
+
+def route_class(method: str, path: str) -> str:
+    if method == "POST" and CHECKOUT_PATH.match(path):
+        return CHECKOUT
+    if path.startswith("/api/v1/uploads") or path.startswith("/api/v1/admin/import"):
+        return UPLOAD if method != "GET" else BROWSE
+    if method in ("GET", "HEAD"):
+        return BROWSE
+    return WRITE
+
+class TokenBuckets:
+    def __init__(self, limits: dict, max_buckets: int = MAX_BUCKETS):
+        self.limits = limits
+        self.max_buckets = max_buckets
+        self._buckets = OrderedDict()  # (client, class) -> [tokens, updated at]
+
+    def take(self, client: str, klass: str) -> float:
+        """Spend one token; returns 0 when allowed, else seconds until one is available."""
+        rate, burst = self.limits[klass]
+        now = time.monotonic()
+        key = (client, klass)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [burst, now]
+            while len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+        else:
+            bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            self._buckets.move_to_end(key)
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return 0
+        return (1 - bucket[0]) / rate
+
+class AdmissionController:
+    """Concurrency limit in front of the database pool with per-class priority queues."""
+
+    def __init__(self, limit: int, queue_limit: int, queue_timeout: float):
+        self.limit = limit
+        self.queue_limit = queue_limit
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._waiters = {klass: deque() for klass in sorted(PRIORITY, key=PRIORITY.get)}
+
+    def waiting(self) -> int:
+        return sum(len(waiters) for waiters in self._waiters.values())
+
+    async def acquire(self, klass: str) -> bool:
+        if self.active < self.limit and not self.waiting():
+            self.active += 1
+            return True
+        if self.waiting() >= self.queue_limit * QUEUE_SHARE[klass]:
+            return False
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters[klass].append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+            return True
+        except asyncio.TimeoutError:
+            # A slot handed over just as the timeout fired is still ours.
+            if waiter.done() and not waiter.cancelled():
+                return True
+            self._discard(klass, waiter)
+            return False
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            else:
+                self._discard(klass, waiter)
+            raise
+
+    def _discard(self, klass: str, waiter):
+        try:
+            self._waiters[klass].remove(waiter)
+        except ValueError:
+            pass
+
+    def release(self):
+        # The slot passes straight to the highest-priority waiter still queued.
+        for waiters in self._waiters.values():
+            while waiters:
+                waiter = waiters.popleft()
+                if not waiter.done():
+                    waiter.set_result(True)
+                    return
+        self.active -= 1
+
+def default_concurrency() -> int:
+    if settings.DB_CONNECTION_BUDGET:
+        return pool_size()
+    # Prisma's default pool size per process.
+    return (os.cpu_count() or 1) * 2 + 1
+
+buckets = TokenBuckets(RATE_LIMITS)
+controller = AdmissionController(
+    settings.ADMISSION_CONCURRENCY or default_concurrency(),
+    settings.ADMISSION_QUEUE_LIMIT,
+    settings.ADMISSION_QUEUE_TIMEOUT
+)
+
+def client_key(scope) -> str:
+    # Limited per address. Bearer tokens are not verified until the route runs, so
+    # keying on them would hand every made-up token a fresh bucket.
+    client = scope.get("client")
+    return "ip:" + (client[0] if client else "unknown")
+
+def metric_lines() -> list:
+    for klass, waiters in controller._waiters.items():
+        queue_depth.set((klass,), len(waiters))
+    active_requests.set((), controller.active)
+    return queue_depth.render() + active_requests.render() + rejections.render()
+
+class AdmissionMiddleware:
+    """Pure ASGI middleware: per-client token buckets, then a shared concurrency limit."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS" or scope["path"] in EXEMPT_PATHS:
+            return await self.app(scope, receive, send)
+
+        if not readiness.is_ready():
+            rejections.inc(("all", "starting"))
+            response = JSONResponse(
+                {"detail": "Server is starting, please retry"}, status_code=503,
+                headers={"Retry-After": str(NOT_READY_RETRY_SECONDS)}
+            )
+            return await response(scope, receive, send)
+
+        klass = route_class(scope["method"], scope["path"])
+        if settings.RATE_LIMIT_ENABLED:
+            wait = buckets.take(client_key(scope), klass)
+            if wait:
+                rejections.inc((klass, "rate_limited"))
+                response = JSONResponse(
+                    {"detail": "Too many requests"}, status_code=429,
+                    headers={"Retry-After": str(math.ceil(wait))}
+                )
+                return await response(scope, receive, send)
+
+        if scope["path"] in STREAM_PATHS or (klass == BROWSE and scope["path"].startswith(MEDIA_PREFIX)):
+            return await self.app(scope, receive, send)
+
+        if not await controller.acquire(klass):
+            rejections.inc((klass, "overloaded"))
+            response = JSONResponse(
+                {"detail": "Server is busy, please retry"}, status_code=503,
+                headers={"Retry-After": str(max(1, math.ceil(controller.queue_timeout)))}
+            )
+            return await response(scope, receive, send)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.release()
@@ -0,0 +1,143 @@
+from itertools import islice
+from starlette.concurrency import run_in_threadpool
+from app.schemas import PetCreate, PetResponse, ProductCreate, ProductResponse, OrderResponse, OrderItemResponse
+from app.services.prisma_client import prisma_client
+from app.services.pagination import KEYSET_ORDER, keyset_after
+import csv
+import io
+import json
+
+IMPORT_BATCH_SIZE = 1000
+EXPORT_PAGE_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+LIST_SEPARATOR = "|"
+
+IMPORT_SCHEMAS = {"pets": PetCreate, "products": ProductCreate}
+EXPORT_FIELDS = {
+    "pets": list(PetResponse.model_fields),
+    "products": list(ProductResponse.model_fields),
+    "orders": [f for f in OrderResponse.model_fields if f != "orderItems"],
+}
+ORDER_ITEM_FIELDS = [f for f in OrderItemResponse.model_fields if f not in ("product", "pet")]
+
+def table_for(kind: str):
+    return {"pets": prisma_client.pet, "products": prisma_client.product, "orders": prisma_client.order}[kind]
+
+def _from_csv(row: dict, schema) -> dict:
+    record = {}
+    for key, value in row.items():
+        if key is None or value is None or value == "":
+            continue
+        field = schema.model_fields.get(key)
+        if field is not None and getattr(field.annotation, "__origin__", None) is list:
+            record[key] = [part for part in value.split(LIST_SEPARATOR) if part]
+        else:
+            record[key] = value
+    return record
+
+def read_records(stream, fmt: str, kind: str):
+    """Yield (line_number, record_or_error) from a text stream without loading it whole."""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, _from_csv(row, IMPORT_SCHEMAS[kind])
+        return
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError as e:
+            yield line_number, e
+
+def _take(records, count: int) -> list:
+    return list(islice(records, count))
+
+async def import_catalog(kind: str, records, start_after: int = 0, batch_size: int = IMPORT_BATCH_SIZE, on_batch=None) -> dict:
+    """Validate and insert records in create_many batches.
+
+    Lines up to start_after are skipped so an interrupted import can resume from
+    its last checkpoint; on_batch(last_line) is awaited after every committed batch.
+    Records carrying an "id" are inserted with skip_duplicates, making a replayed
+    batch harmless.
+    """
+    schema = IMPORT_SCHEMAS[kind]
+    table = table_for(kind)
+    imported = 0
+    error_count = 0
+    errors = []
+    last_line = start_after
+
+    while True:
+        # Parsing pulls from a blocking stream, so each batch is read in the threadpool.
+        batch = await run_in_threadpool(_take, records, batch_size)
+        if not batch:
+            break
+        rows = []
+        for line_number, record in batch:
+            if line_number <= start_after:
+                continue
+            last_line = line_number
+            try:
+                if isinstance(record, Exception):
+                    raise record
+                row = schema(**record).dict()
+                if record.get("id"):
+                    row["id"] = record["id"]
+                rows.append(row)
+            except Exception as e:
+                error_count += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append({"line": line_number, "error": str(e)})
+        if rows:
+            imported += await table.create_many(data=rows, skip_duplicates=True)
+        if on_batch:
+            await on_batch(last_line)
+
+    return {"imported": imported, "failed": error_count, "errors": errors, "last_line": last_line}
+
+def _plain(value):
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+def _csv_line(values: list) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(values)
+    return buffer.getvalue()
+
+def _csv_value(value):
+    if isinstance(value, list):
+        return LIST_SEPARATOR.join(value)
+    return "" if value is None else _plain(value)
+
+async def export_catalog(kind: str, fmt: str, page_size: int = EXPORT_PAGE_SIZE):
+    """Stream every row of a table as JSONL or CSV text, one keyset page at a time."""
+    table = table_for(kind)
+    fields = EXPORT_FIELDS[kind]
+    include = {"orderItems": True} if kind == "orders" else None
+
+    if fmt == "csv":
+        header = fields + [f"item_{f}" for f in ORDER_ITEM_FIELDS] if kind == "orders" else fields
+        yield _csv_line(header)
+
+    where = {}
+    while True:
+        rows = await table.find_many(where=where, take=page_size, order=KEYSET_ORDER, include=include)
+        for row in rows:
+            values = {field: getattr(row, field) for field in fields}
+            if fmt == "csv":
+                base = [_csv_value(values[field]) for field in fields]
+                if kind == "orders":
+                    # One line per order item so the export stays flat.
+                    for item in row.orderItems or []:
+                        yield _csv_line(base + [_csv_value(getattr(item, f)) for f in ORDER_ITEM_FIELDS])
+                else:
+                    yield _csv_line(base)
+            else:
+                if kind == "orders":
+                    values["orderItems"] = [{f: getattr(item, f) for f in ORDER_ITEM_FIELDS} for item in row.orderItems or []]
+                yield json.dumps(values, default=_plain) + "\n"
+        if len(rows) < page_size:
+            break
+        where = keyset_after({}, rows[-1].createdAt, rows[-1].id)
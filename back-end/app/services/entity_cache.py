@@ -0,0 +1,67 @@
+import time
+from collections import OrderedDict
+
+class EntityCache:
+    """Bounded LRU cache with a per-entry TTL for rarely changing detail rows."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        # Bumped on every invalidation; read-throughs that raced one pass it to set().
+        self.generation = 0
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key, value, generation: int = None):
+        """Store value, unless generation (read before loading it) shows an invalidation since."""
+        if generation is not None and generation != self.generation:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        self.generation += 1
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self.generation += 1
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+pet_cache = EntityCache()
+product_cache = EntityCache()
+
+def metric_lines() -> list:
+    caches = {"pet": pet_cache, "product": product_cache}
+    lines = ["# TYPE entity_cache_hits_total counter"]
+    lines += [f'entity_cache_hits_total{{cache="{name}"}} {cache.hits}' for name, cache in caches.items()]
+    lines.append("# TYPE entity_cache_misses_total counter")
+    lines += [f'entity_cache_misses_total{{cache="{name}"}} {cache.misses}' for name, cache in caches.items()]
+    lines.append("# TYPE entity_cache_size gauge")
+    lines += [f'entity_cache_size{{cache="{name}"}} {len(cache._entries)}' for name, cache in caches.items()]
+    return lines
+
+def entity_etag(entity) -> str:
+    return f'"{entity.id}-{int(entity.updatedAt.timestamp() * 1_000_000)}"'
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
@@ -0,0 +1,14 @@
+from fastapi import HTTPException
+
+def parse_expand(expand: str, allowed: dict):
+    """Turn ?expand=a,b into a Prisma include, limited to the relations a route allows."""
+    if not expand:
+        return None
+    include = {}
+    for name in (part.strip() for part in expand.split(",")):
+        if not name:
+            continue
+        if name not in allowed:
+            raise HTTPException(status_code=400, detail=f"Cannot expand '{name}'. Allowed: {', '.join(allowed)}")
+        include.update(allowed[name])
+    return include or None
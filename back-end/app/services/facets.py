@@ -0,0 +1,59 @@
+from collections import Counter, defaultdict
+from app.services import replica
+
+# Filter-sidebar values with per-value row counts, kept current by the pet/product write handlers.
+species = Counter()
+breeds = defaultdict(Counter)
+categories = Counter()
+brands = Counter()
+
+def _bump(counter: Counter, value, delta: int):
+    if value is None:
+        return
+    counter[value] += delta
+    if counter[value] <= 0:
+        del counter[value]
+
+def add_pet(pet, delta: int = 1):
+    _bump(species, pet.species, delta)
+    _bump(breeds[pet.species], pet.breed, delta)
+    if not breeds[pet.species]:
+        del breeds[pet.species]
+
+def remove_pet(pet):
+    add_pet(pet, -1)
+
+def breeds_for(pet_species: str) -> Counter:
+    return breeds.get(pet_species, Counter())
+
+def add_product(product, delta: int = 1):
+    _bump(categories, product.category, delta)
+    _bump(brands, product.brand, delta)
+
+def remove_product(product):
+    add_product(product, -1)
+
+def ranked(counter: Counter, with_counts: bool = False) -> list:
+    # Most common first, ties broken alphabetically so responses are stable.
+    items = sorted(counter.items(), key=lambda kv: (-kv[1], kv[0]))
+    if with_counts:
+        return [{"value": value, "count": count} for value, count in items]
+    return [value for value, _ in items]
+
+async def rebuild():
+    pet_groups = await replica.read(lambda db: db.pet.group_by(by=["species", "breed"], count=True))
+    product_groups = await replica.read(lambda db: db.product.group_by(by=["category", "brand"], count=True))
+
+    species.clear()
+    breeds.clear()
+    categories.clear()
+    brands.clear()
+
+    for group in pet_groups:
+        count = group["_count"]["_all"]
+        _bump(species, group["species"], count)
+        _bump(breeds[group["species"]], group["breed"], count)
+    for group in product_groups:
+        count = group["_count"]["_all"]
+        _bump(categories, group["category"], count)
+        _bump(brands, group["brand"], count)
@@ -1,11 +1,33 @@
-import firebase_admin
-from firebase_admin import credentials, auth
+from fastapi import Depends, Header, HTTPException
+from starlette.concurrency import run_in_threadpool
 from app.config import get_settings
+from functools import lru_cache
+import asyncio
+import hashlib
+import httpx
+import json
 import os
+import re
+import time
 
 settings = get_settings()
 
+TOKEN_CACHE_SIZE = 10000
+KEY_REFRESH_FLOOR_SECONDS = 60
+KEY_REFRESH_MARGIN_SECONDS = 300
+
+_signing_keys = {}
+_keys_expire_at = 0.0
+_keys_lock = asyncio.Lock()
+_refresh_task = None
+_claims_cache = {}
+
+# firebase_admin and google.auth are imported on first use rather than at startup; the
+# Google client stack is the slowest import in the app and most requests never need it.
+
 def init_fbase():
+    import firebase_admin
+    from firebase_admin import credentials
     if not firebase_admin._apps:
         cred_path = settings.FBASE_CREDENTIALS
         if os.path.exists(cred_path):
@@ -17,8 +39,117 @@ def init_fbase():
 def verify_fbase_token(token: str):
     try:
         init_fbase()
+        from firebase_admin import auth
         decoded_token = auth.verify_id_token(token)
         return decoded_token
     except Exception as e:
         print(f"Token verification failed: {e}")
         return None
+
+@lru_cache()
+def get_project_id():
+    if settings.FBASE_PROJECT_ID:
+        return settings.FBASE_PROJECT_ID
+    if os.path.exists(settings.FBASE_CREDENTIALS):
+        with open(settings.FBASE_CREDENTIALS) as f:
+            return json.load(f).get("project_id")
+    return None
+
+async def fetch_signing_keys() -> int:
+    global _signing_keys, _keys_expire_at
+    async with httpx.AsyncClient(timeout=10) as client:
+        response = await client.get(settings.FBASE_CERTS_URL)
+        response.raise_for_status()
+    match = re.search(r"max-age=(\d+)", response.headers.get("cache-control", ""))
+    max_age = int(match.group(1)) if match else 3600
+    _signing_keys = response.json()
+    _keys_expire_at = time.time() + max_age
+    return max_age
+
+async def _ensure_signing_keys():
+    if _signing_keys and _keys_expire_at > time.time():
+        return
+    async with _keys_lock:
+        if not _signing_keys or _keys_expire_at <= time.time():
+            await fetch_signing_keys()
+
+async def _refresh_keys_forever():
+    while True:
+        try:
+            max_age = await fetch_signing_keys()
+            delay = max(KEY_REFRESH_FLOOR_SECONDS, max_age - KEY_REFRESH_MARGIN_SECONDS)
+        except Exception as e:
+            print(f"Signing key refresh failed: {e}")
+            delay = KEY_REFRESH_FLOOR_SECONDS
+        await asyncio.sleep(delay)
+
+def start_key_refresh():
+    global _refresh_task
+    if _refresh_task is None and get_project_id():
+        _refresh_task = asyncio.create_task(_refresh_keys_forever())
+
+async def stop_key_refresh():
+    global _refresh_task
+    if _refresh_task:
+        _refresh_task.cancel()
+        _refresh_task = None
+
+def _decode_id_token(token: str, keys: dict, project_id: str) -> dict:
+    from google.auth import jwt as google_jwt
+    claims = google_jwt.decode(token, certs=keys, audience=project_id)
+    if claims.get("iss") != f"https://securetoken.google.com/{project_id}":
+        raise ValueError("Invalid token issuer")
+    if not claims.get("sub"):
+        raise ValueError("Token has no subject")
+    claims["uid"] = claims["sub"]
+    return claims
+
+def _remember_claims(key: str, claims: dict):
+    if len(_claims_cache) >= TOKEN_CACHE_SIZE:
+        now = time.time()
+        for stale in [k for k, (exp, _) in _claims_cache.items() if exp <= now]:
+            del _claims_cache[stale]
+        if len(_claims_cache) >= TOKEN_CACHE_SIZE:
+            del _claims_cache[next(iter(_claims_cache))]
+    _claims_cache[key] = (claims["exp"], claims)
+
+async def verify_fbase_token_async(token: str):
+    key = hashlib.sha256(token.encode()).hexdigest()
+    cached = _claims_cache.get(key)
+    if cached and cached[0] > time.time():
+        return cached[1]
+
+    project_id = get_project_id()
+    try:
+        if project_id:
+            await _ensure_signing_keys()
+            claims = await run_in_threadpool(_decode_id_token, token, _signing_keys, project_id)
+        else:
+            claims = await run_in_threadpool(verify_fbase_token, token)
+    except Exception as e:
+        print(f"Token verification failed: {e}")
+        return None
+
+    if claims:
+        _remember_claims(key, claims)
+    return claims
+
+async def get_current_user(authorization: str = Header(None)):
+    if not authorization or not authorization.lower().startswith("bearer "):
+        raise HTTPException(status_code=401, detail="No token provided")
+    decoded = await verify_fbase_token_async(authorization[7:].strip())
+    if not decoded:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    return decoded
+
+def admin_uids() -> set:
+    return {uid.strip() for uid in settings.ADMIN_UIDS.split(",") if uid.strip()}
+
+def is_admin(claims: dict) -> bool:
+    # Admins carry the Firebase custom claim admin=true or are listed in ADMIN_UIDS.
+    return claims.get("admin") is True or claims.get("uid") in admin_uids()
+
+async def require_admin(user: dict = Depends(get_current_user)):
+    if not is_admin(user):
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return user
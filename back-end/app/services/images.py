@@ -0,0 +1,89 @@
+from concurrent.futures import ProcessPoolExecutor
+from app.config import get_settings
+import asyncio
+import glob
+import os
+
+settings = get_settings()
+
+VARIANT_WIDTHS = {"thumb": 160, "card": 480, "full": 1600}
+VARIANT_FORMATS = {"jpg", "jpeg", "png", "gif", "webp"}
+VARIANT_DIR_NAME = "variants"
+
+_pool = None
+_in_flight = {}
+_background = set()
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # Web workers split the cores instead of each starting one renderer per core.
+        workers = settings.IMAGE_WORKERS or max(1, (os.cpu_count() or 1) // settings.WEB_WORKERS)
+        _pool = ProcessPoolExecutor(max_workers=workers)
+    return _pool
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+def snap_width(width: int) -> int:
+    # Only a fixed set of widths is rendered so arbitrary ?w= values can't fill the disk.
+    for candidate in sorted(VARIANT_WIDTHS.values()):
+        if width <= candidate:
+            return candidate
+    return max(VARIANT_WIDTHS.values())
+
+def variant_path(upload_dir: str, filename: str, width: int, fmt: str) -> str:
+    stem = filename.rsplit(".", 1)[0]
+    return os.path.join(upload_dir, VARIANT_DIR_NAME, f"{stem}_{width}.{fmt}")
+
+def remove_variants(upload_dir: str, filename: str):
+    stem = filename.rsplit(".", 1)[0]
+    for name in glob.glob(os.path.join(upload_dir, VARIANT_DIR_NAME, f"{glob.escape(stem)}_*")):
+        os.remove(name)
+
+def _render(src: str, dst: str, width: int, fmt: str):
+    # Runs in a worker process; Pillow is imported there so the API workers never load it.
+    from PIL import Image, ImageOps
+
+    with Image.open(src) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((width, width * 4))
+        save_format = {"jpg": "JPEG", "jpeg": "JPEG"}.get(fmt, fmt.upper())
+        if save_format == "JPEG" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        temp = f"{dst}.{os.getpid()}.tmp"
+        image.save(temp, format=save_format, quality=82, optimize=True)
+        os.replace(temp, dst)
+
+async def render_variant(upload_dir: str, filename: str, width: int, fmt: str) -> str:
+    dst = variant_path(upload_dir, filename, width, fmt)
+    if os.path.exists(dst):
+        return dst
+
+    # Concurrent requests for the same missing variant share one render.
+    future = _in_flight.get(dst)
+    if future is None:
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(get_pool(), _render, os.path.join(upload_dir, filename), dst, width, fmt)
+        _in_flight[dst] = future
+        future.add_done_callback(lambda _: _in_flight.pop(dst, None))
+    await future
+    return dst
+
+async def _render_all(upload_dir: str, filename: str):
+    source_fmt = filename.rsplit(".", 1)[1].lower()
+    for width in VARIANT_WIDTHS.values():
+        for fmt in {source_fmt, "webp"}:
+            try:
+                await render_variant(upload_dir, filename, width, fmt)
+            except Exception as e:
+                print(f"Variant {width}/{fmt} of {filename} failed: {e}")
+
+def schedule_derivatives(upload_dir: str, filename: str):
+    task = asyncio.create_task(_render_all(upload_dir, filename))
+    _background.add(task)
+    task.add_done_callback(_background.discard)
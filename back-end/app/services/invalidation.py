@@ -0,0 +1,162 @@
+import asyncio
+import json
+import uuid
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from app.config import get_settings
+from app.services.prisma_client import prisma_client
+from app.services import facets, listing_cache, search_index, similarity
+from app.services.entity_cache import pet_cache, product_cache
+
+# Every worker keeps its own caches; writes are broadcast on a Postgres channel so the
+# other workers (and other containers on the same database) drop what they hold.
+
+settings = get_settings()
+
+CHANNEL = "petbloom_invalidate"
+RECONNECT_SECONDS = 5
+FACET_REBUILD_DELAY = 0.5
+# Query parameters understood by Prisma's engine but rejected by asyncpg.
+PRISMA_URL_PARAMS = {"schema", "connection_limit", "pool_timeout", "pgbouncer", "connect_timeout", "socket_timeout", "statement_cache_size"}
+
+origin = uuid.uuid4().hex
+received = 0
+_listener_task = None
+_facets_pending = False
+_background = set()
+# Other channels sharing this worker's LISTEN connection: channel -> (callback, on_reconnect).
+_channels = {}
+
+def listener_dsn(url: str) -> str:
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query) if k not in PRISMA_URL_PARAMS]
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+async def publish(pets=(), products=(), facets_changed: bool = False, search_rebuild: bool = False):
+    """Tell the other workers about a committed write already applied to this worker's caches."""
+    message = {
+        "origin": origin,
+        "catalog": listing_cache.catalog_version,
+        "pets": list(pets),
+        "products": list(products),
+        "facets": facets_changed,
+        "search": search_rebuild,
+    }
+    try:
+        await prisma_client.execute_raw("SELECT pg_notify($1, $2)", CHANNEL, json.dumps(message))
+    except Exception as e:
+        # The write itself succeeded; peers fall back to their cache TTLs.
+        print(f"Cache invalidation broadcast failed: {e}")
+
+def listen(channel: str, callback, on_reconnect=None):
+    """Receive notifications on another channel over the same connection; register before startup."""
+    _channels[channel] = (callback, on_reconnect)
+
+def metric_lines() -> list:
+    return ["# TYPE cache_invalidations_received_total counter", f"cache_invalidations_received_total {received}"]
+
+def _spawn(coro):
+    task = asyncio.create_task(coro)
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+
+async def _rebuild_facets():
+    global _facets_pending
+    # Coalesce bursts of writes into a single pair of group_by queries.
+    await asyncio.sleep(FACET_REBUILD_DELAY)
+    _facets_pending = False
+    await facets.rebuild()
+
+def _schedule_facets():
+    global _facets_pending
+    if not _facets_pending:
+        _facets_pending = True
+        _spawn(_rebuild_facets())
+
+async def _refresh_rows(kind: str, ids: list, search: bool):
+    # Similarity files may live on another container's disk, so peers rewrite the rows too.
+    table = prisma_client.pet if kind == "pet" else prisma_client.product
+    rows = {row.id: row for row in await table.find_many(where={"id": {"in": ids}})}
+    for row_id in ids:
+        if row_id in rows:
+            await similarity.upsert(kind, rows[row_id])
+            if search:
+                search_index.upsert(kind, rows[row_id])
+        else:
+            await similarity.discard(kind, row_id)
+            if search:
+                search_index.discard(kind, row_id)
+
+def apply(message: dict):
+    global received
+    received += 1
+    for pet_id in message.get("pets", ()):
+        pet_cache.invalidate(pet_id)
+    for product_id in message.get("products", ()):
+        product_cache.invalidate(product_id)
+    if message.get("catalog"):
+        listing_cache.bump_catalog_version(message["catalog"])
+    if message.get("facets"):
+        _schedule_facets()
+    if message.get("search"):
+        _spawn(search_index.rebuild())
+    refresh_search = search_index.index.loaded and not message.get("search")
+    if message.get("pets"):
+        _spawn(_refresh_rows("pet", message["pets"], refresh_search))
+    if message.get("products"):
+        _spawn(_refresh_rows("product", message["products"], refresh_search))
+
+def _on_notify(connection, pid, channel, payload):
+    try:
+        message = json.loads(payload)
+    except ValueError:
+        return
+    if message.get("origin") != origin:
+        apply(message)
+
+def resync():
+    # Anything may have changed while the listener was down, so start from scratch.
+    pet_cache.clear()
+    product_cache.clear()
+    listing_cache.bump_catalog_version()
+    _schedule_facets()
+    _spawn(search_index.rebuild())
+
+async def _listen_forever():
+    # Imported here so asyncpg stays off the startup path; the listener runs in the background.
+    import asyncpg
+    connected_before = False
+    while True:
+        connection = None
+        try:
+            connection = await asyncpg.connect(listener_dsn(settings.DATABASE_URL))
+            lost = asyncio.Event()
+            connection.add_termination_listener(lambda _: lost.set())
+            await connection.add_listener(CHANNEL, _on_notify)
+            for channel, (callback, _) in _channels.items():
+                await connection.add_listener(channel, callback)
+            if connected_before:
+                resync()
+                for _, on_reconnect in _channels.values():
+                    if on_reconnect:
+                        _spawn(on_reconnect())
+            connected_before = True
+            await lost.wait()
+            print("Cache invalidation listener disconnected")
+        except asyncio.CancelledError:
+            if connection is not None:
+                await connection.close()
+            raise
+        except Exception as e:
+            print(f"Cache invalidation listener failed: {e}")
+        await asyncio.sleep(RECONNECT_SECONDS)
+
+def start_listener():
+    global _listener_task
+    if _listener_task is None:
+        _listener_task = asyncio.create_task(_listen_forever())
+
+async def stop_listener():
+    global _listener_task
+    if _listener_task:
+        _listener_task.cancel()
+        _listener_task = None
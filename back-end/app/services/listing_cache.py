@@ -0,0 +1,73 @@
+from fastapi import Request, Response
+from app.services.entity_cache import EntityCache, etag_matches
+from app.services.serialization import encode
+import gzip
+import inspect
+import hashlib
+import time
+
+try:
+    import brotli
+except ImportError:  # gzip still works without the optional brotli wheel
+    brotli = None
+
+COMPRESS_MIN_BYTES = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+def _new_version() -> str:
+    return format(time.time_ns(), "x")
+
+# Replaced on every pet/product write; listing ETags and cached bodies are keyed on it.
+# Each worker only ever moves its version forward, past any version a peer broadcast,
+# so a version seen before a write is never current again anywhere, and a restart
+# never reuses an old value.
+catalog_version = _new_version()
+bodies = EntityCache(maxsize=512, ttl=600)
+
+def bump_catalog_version(seen: str = None) -> str:
+    """Mint a version newer than the current one and than seen, a peer's version."""
+    global catalog_version
+    floor = max(int(catalog_version, 16), int(seen, 16) if seen else 0)
+    catalog_version = format(max(time.time_ns(), floor + 1), "x")
+    return catalog_version
+
+def listing_etag(request: Request) -> str:
+    query = "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+    digest = hashlib.blake2b(f"{request.url.path}?{query}".encode(), digest_size=8).hexdigest()
+    return f'W/"{catalog_version}-{digest}"'
+
+def choose_encoding(accept_encoding: str) -> str:
+    offered = {part.split(";")[0].strip() for part in accept_encoding.lower().split(",")}
+    if brotli is not None and "br" in offered:
+        return "br"
+    if "gzip" in offered:
+        return "gzip"
+    return "identity"
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+async def cached_listing(request: Request, build) -> Response:
+    """Answer a catalog read from the per-ETag body cache, calling build() only on a miss."""
+    etag = listing_etag(request)
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    entry = bodies.get(etag)
+    if entry is None:
+        content = build()
+        if inspect.isawaitable(content):
+            content = await content
+        entry = {"identity": encode(content)}
+        bodies.set(etag, entry)
+
+    encoding = choose_encoding(request.headers.get("accept-encoding", ""))
+    if encoding == "identity" or len(entry["identity"]) < COMPRESS_MIN_BYTES:
+        return Response(entry["identity"], media_type="application/json", headers=headers)
+    if encoding not in entry:
+        entry[encoding] = _compress(entry["identity"], encoding)
+    return Response(entry[encoding], media_type="application/json", headers={**headers, "Content-Encoding": encoding})
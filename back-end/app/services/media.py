@@ -0,0 +1,186 @@
+import hashlib
+import mimetypes
+import os
+import re
+import secrets
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response
+from app.services.entity_cache import etag_matches
+
+# File responses with byte ranges for video seeking and resumable downloads.
+#
+# Bodies go out with the ASGI zero-copy extension (os.sendfile in the server) when
+# the server offers it. Otherwise they are read with os.pread straight into the
+# bytes handed to the server, with no file object buffering in between.
+
+CHUNK_SIZE = 256 * 1024
+# More ranges than this (after merging) are answered with the whole file.
+MAX_RANGES = 16
+CONTENT_ADDRESSED = re.compile(r"^[0-9a-f]{64}\.[a-z0-9]+$")
+MAX_CACHED_ETAGS = 4096
+
+_etags = OrderedDict()  # (path, size, mtime_ns) -> etag
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+async def strong_etag(path: str, stat_result: os.stat_result) -> str:
+    """Content hash ETag: read from content-addressed names, else hashed once per file version."""
+    name = os.path.basename(path)
+    if CONTENT_ADDRESSED.match(name):
+        return f'"{name.split(".", 1)[0]}"'
+    key = (path, stat_result.st_size, stat_result.st_mtime_ns)
+    etag = _etags.get(key)
+    if etag is None:
+        etag = _etags[key] = f'"{await run_in_threadpool(_hash_file, path)}"'
+        while len(_etags) > MAX_CACHED_ETAGS:
+            _etags.popitem(last=False)
+    else:
+        _etags.move_to_end(key)
+    return etag
+
+def parse_ranges(header: str, size: int) -> list:
+    """Merged, sorted (start, end) pairs, end inclusive; [] means serve the whole file."""
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes":
+        return []
+    ranges = []
+    for part in spec.split(","):
+        first, dash, last = part.strip().partition("-")
+        try:
+            if not dash or not (first or last):
+                return []
+            if first:
+                start, end = int(first), int(last) if last else size - 1
+                if last and end < start:
+                    return []
+            else:
+                # Suffix range: the final N bytes.
+                start, end = size - int(last), size - 1
+        except ValueError:
+            return []
+        # Parts starting past the end can never be served; the rest are clamped to the file.
+        if start < size and end >= 0 and (first or int(last) > 0):
+            ranges.append((max(start, 0), min(end, size - 1)))
+    if not ranges:
+        raise RangeNotSatisfiable()
+    ranges.sort()
+    merged = [ranges[0]]
+    for start, end in ranges[1:]:
+        if start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged if len(merged) <= MAX_RANGES else []
+
+def _not_modified(request_headers, etag: str, mtime: float) -> bool:
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+def _range_applies(request_headers, etag: str, last_modified: str) -> bool:
+    # If-Range only honours an exact strong validator; otherwise send the whole file.
+    if_range = request_headers.get("if-range")
+    return if_range is None or if_range.strip() in (etag, last_modified)
+
+class MediaResponse(Response):
+    """Serve a file with conditional requests, single and multipart byte ranges, and HEAD."""
+
+    def __init__(self, path: str, request, headers: dict = None, media_type: str = None):
+        self.path = path
+        self.request = request
+        self.media_type = media_type or mimetypes.guess_type(path)[0] or "application/octet-stream"
+        self.extra_headers = headers or {}
+        self.background = None
+        self.status_code = 200
+        self.init_headers({})
+
+    async def __call__(self, scope, receive, send):
+        stat_result = await run_in_threadpool(os.stat, self.path)
+        size = stat_result.st_size
+        etag = await strong_etag(self.path, stat_result)
+        last_modified = formatdate(stat_result.st_mtime, usegmt=True)
+        request_headers = self.request.headers
+        headers = {**self.extra_headers, "Accept-Ranges": "bytes", "ETag": etag, "Last-Modified": last_modified}
+
+        if _not_modified(request_headers, etag, stat_result.st_mtime):
+            return await Response(status_code=304, headers=headers)(scope, receive, send)
+
+        ranges = []
+        range_header = request_headers.get("range")
+        if range_header and scope["method"] == "GET" and _range_applies(request_headers, etag, last_modified):
+            try:
+                ranges = parse_ranges(range_header, size)
+            except RangeNotSatisfiable:
+                headers["Content-Range"] = f"bytes */{size}"
+                return await Response(status_code=416, headers=headers)(scope, receive, send)
+
+        parts = []  # (prefix bytes, start, count)
+        if not ranges:
+            status = 200
+            headers["Content-Type"] = self.media_type
+            parts.append((b"", 0, size))
+            epilogue = b""
+        elif len(ranges) == 1:
+            status = 206
+            start, end = ranges[0]
+            headers["Content-Type"] = self.media_type
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+            parts.append((b"", start, end - start + 1))
+            epilogue = b""
+        else:
+            status = 206
+            boundary = secrets.token_hex(16)
+            headers["Content-Type"] = f"multipart/byteranges; boundary={boundary}"
+            for index, (start, end) in enumerate(ranges):
+                prefix = (b"\r\n" if index else b"") + (
+                    f"--{boundary}\r\n"
+                    f"Content-Type: {self.media_type}\r\n"
+                    f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n"
+                ).encode()
+                parts.append((prefix, start, end - start + 1))
+            epilogue = f"\r\n--{boundary}--\r\n".encode()
+        headers["Content-Length"] = str(sum(len(prefix) + count for prefix, _, count in parts) + len(epilogue))
+
+        self.status_code = status
+        self.init_headers(headers)
+        await send({"type": "http.response.start", "status": status, "headers": self.raw_headers})
+        if scope["method"] == "HEAD":
+            return await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+        zero_copy = "http.response.zerocopysend" in scope.get("extensions", {})
+        fd = await run_in_threadpool(os.open, self.path, os.O_RDONLY)
+        try:
+            for prefix, start, count in parts:
+                if prefix:
+                    await send({"type": "http.response.body", "body": prefix, "more_body": True})
+                if zero_copy:
+                    await send({"type": "http.response.zerocopysend", "file": fd, "offset": start, "count": count, "more_body": True})
+                    continue
+                offset, remaining = start, count
+                while remaining:
+                    chunk = await run_in_threadpool(os.pread, fd, min(CHUNK_SIZE, remaining), offset)
+                    if not chunk:
+                        raise RuntimeError(f"{self.path} was truncated while being served")
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                    offset += len(chunk)
+                    remaining -= len(chunk)
+            await send({"type": "http.response.body", "body": epilogue, "more_body": False})
+        finally:
+            os.close(fd)
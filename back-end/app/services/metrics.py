@@ -0,0 +1,159 @@
+from bisect import bisect_left
+from contextvars import ContextVar
+import time
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50)
+
+class RequestStats:
+    __slots__ = ("db_count", "db_time", "serialize_time")
+
+    def __init__(self):
+        self.db_count = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+
+current_request = ContextVar("current_request", default=None)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(names, values) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+class Counter:
+    def __init__(self, name: str, help: str, labels=()):
+        self.name, self.help, self.labels = name, help, labels
+        self.values = {}
+
+    def inc(self, labels=(), amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in self.values.items():
+            lines.append(f"{self.name}{_format_labels(self.labels, labels)} {value}")
+        return lines
+
+class Gauge(Counter):
+    def dec(self, labels=(), amount: float = 1):
+        self.inc(labels, -amount)
+
+    def set(self, labels=(), value: float = 0):
+        self.values[labels] = value
+
+    def render(self) -> list:
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labels, self.buckets = name, help, labels, buckets
+        self.series = {}  # labels -> [per-bucket counts..., +Inf count, sum]
+
+    def observe(self, labels, value: float):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [0] * (len(self.buckets) + 2)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.labels + ("le",)
+        for labels, series in self.series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(names, labels + (bound,))} {cumulative}")
+            base = _format_labels(self.labels, labels)
+            lines.append(f"{self.name}_sum{base} {series[-1]}")
+            lines.append(f"{self.name}_count{base} {cumulative}")
+        return lines
+
+requests_total = Counter("http_requests_total", "HTTP requests by route, method and status.", ("route", "method", "status"))
+request_duration = Histogram("http_request_duration_seconds", "HTTP request latency.", ("route", "method"))
+requests_in_flight = Gauge("http_requests_in_flight", "HTTP requests currently being served.")
+db_queries_per_request = Histogram("db_queries_per_request", "Prisma queries issued per request.", ("route",), QUERY_COUNT_BUCKETS)
+db_query_duration = Histogram("db_query_duration_seconds", "Prisma query latency.", ("model", "method"))
+
+REGISTRY = [requests_total, request_duration, requests_in_flight, db_queries_per_request, db_query_duration]
+_collectors = []
+
+def register_collector(collect):
+    """Add a callable returning extra exposition lines, evaluated on every scrape."""
+    _collectors.append(collect)
+
+def render_metrics() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    for collect in _collectors:
+        lines.extend(collect())
+    return "\n".join(lines) + "\n"
+
+def record_query(model, method: str, elapsed: float):
+    db_query_duration.observe((model or "raw", method), elapsed)
+    stats = current_request.get()
+    if stats is not None:
+        stats.db_count += 1
+        stats.db_time += elapsed
+
+def record_serialize(elapsed: float):
+    stats = current_request.get()
+    if stats is not None:
+        stats.serialize_time += elapsed
+
+class MetricsMiddleware:
+    """Pure ASGI middleware: route latency, status counts and a Server-Timing header."""
+
+    def __init__(self, app):
+        self.app = app
+        self._route_paths = None
+
+    def _route_label(self, scope) -> str:
+        if self._route_paths is None:
+            router = scope["app"].router
+            self._route_paths = {route.endpoint: route.path for route in router.routes if hasattr(route, "endpoint")}
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        return self._route_paths.get(endpoint, "mounted")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        started = time.perf_counter()
+        status = 500
+        requests_in_flight.inc()
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                total = (time.perf_counter() - started) * 1000
+                timing = (
+                    f"db;dur={stats.db_time * 1000:.2f};desc=\"{stats.db_count} queries\", "
+                    f"serialize;dur={stats.serialize_time * 1000:.2f}, total;dur={total:.2f}"
+                )
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"server-timing", timing.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            elapsed = time.perf_counter() - started
+            route = self._route_label(scope)
+            method = scope["method"]
+            requests_in_flight.dec()
+            requests_total.inc((route, method, status))
+            request_duration.observe((route, method), elapsed)
+            db_queries_per_request.observe((route,), stats.db_count)
+            current_request.reset(token)
@@ -0,0 +1,157 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import time
+from collections import defaultdict
+from app.config import get_settings
+from app.services.prisma_client import prisma_client
+from app.services import invalidation
+
+# Order changes are logged to OrderEvent and announced with NOTIFY when the writing
+# transaction commits. Every worker fans them out to its own open streams, so a
+# customer connected to any worker hears about changes made on any other.
+
+settings = get_settings()
+
+CHANNEL = "petbloom_order_events"
+# EventSource can't send an Authorization header, so streams are opened with a ticket in
+# the query string instead of the Firebase token. Tickets are signed, stateless so any
+# worker accepts them, and only good for opening a stream within TICKET_TTL_SECONDS.
+TICKET_TTL_SECONDS = 60
+TICKET_PURPOSE = "order-events"
+HEARTBEAT_SECONDS = 15
+RETRY_MILLISECONDS = 3000
+QUEUE_SIZE = 64
+REPLAY_PAGE_SIZE = 500
+EVENT_FIELDS = ("id", "userId", "orderId", "type", "status", "trackingNumber")
+
+class Subscription:
+    def __init__(self, user_id: str, last_id: int):
+        self.user_id = user_id
+        self.last_id = last_id
+        self.queue = asyncio.Queue(QUEUE_SIZE)
+        self.overflowed = False
+
+_subscribers = defaultdict(set)  # user id -> subscriptions of open streams
+
+def _sign(payload: bytes) -> str:
+    digest = hmac.new(settings.JWT_SECRET.encode(), payload, hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).decode().rstrip("=")
+
+def issue_ticket(user_id: str) -> str:
+    payload = json.dumps({"sub": user_id, "exp": int(time.time()) + TICKET_TTL_SECONDS, "use": TICKET_PURPOSE}).encode()
+    return f"{base64.urlsafe_b64encode(payload).decode().rstrip('=')}.{_sign(payload)}"
+
+def read_ticket(ticket: str):
+    """The user id a valid, unexpired stream ticket was issued to, else None."""
+    try:
+        encoded, signature = ticket.split(".", 1)
+        payload = base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4))
+        if not hmac.compare_digest(signature, _sign(payload)):
+            return None
+        claims = json.loads(payload)
+    except (TypeError, ValueError):
+        return None
+    if claims.get("use") != TICKET_PURPOSE or claims.get("exp", 0) < time.time():
+        return None
+    return claims.get("sub")
+
+def event_dict(event) -> dict:
+    data = {field: getattr(event, field) for field in EVENT_FIELDS}
+    data["createdAt"] = event.createdAt.isoformat()
+    return data
+
+async def record(tx, order, event_type: str):
+    """Log an order change inside the caller's transaction; the NOTIFY is delivered on commit."""
+    event = await tx.orderevent.create(data={
+        "userId": order.userId,
+        "orderId": order.id,
+        "type": event_type,
+        "status": order.status,
+        "trackingNumber": order.trackingNumber,
+    })
+    await tx.execute_raw("SELECT pg_notify($1, $2)", CHANNEL, json.dumps(event_dict(event)))
+    return event
+
+def _fan_out(event: dict):
+    for subscription in list(_subscribers.get(event["userId"], ())):
+        try:
+            subscription.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # A reader this far behind is cut loose; it resumes from its Last-Event-ID.
+            subscription.overflowed = True
+            _subscribers[event["userId"]].discard(subscription)
+
+def _on_notify(connection, pid, channel, payload):
+    try:
+        event = json.loads(payload)
+    except ValueError:
+        return
+    _fan_out(event)
+
+async def catch_up():
+    # Notifications sent while the listener was reconnecting are read back from the log.
+    for user_id, subscriptions in list(_subscribers.items()):
+        if subscriptions:
+            after = min(subscription.last_id for subscription in subscriptions)
+            for event in await events_after(user_id, after):
+                _fan_out(event)
+
+invalidation.listen(CHANNEL, _on_notify, catch_up)
+
+async def events_after(user_id: str, after_id: int) -> list:
+    events = []
+    while True:
+        page = await prisma_client.orderevent.find_many(
+            where={"userId": user_id, "id": {"gt": after_id}},
+            order={"id": "asc"},
+            take=REPLAY_PAGE_SIZE
+        )
+        events += [event_dict(event) for event in page]
+        if len(page) < REPLAY_PAGE_SIZE:
+            return events
+        after_id = page[-1].id
+
+async def latest_event_id(user_id: str) -> int:
+    latest = await prisma_client.orderevent.find_first(where={"userId": user_id}, order={"id": "desc"})
+    return latest.id if latest else 0
+
+def format_event(event: dict) -> str:
+    return f"id: {event['id']}\ndata: {json.dumps(event)}\n\n"
+
+async def stream(user_id: str, last_event_id: int = None):
+    """Server-Sent Events for one user, replaying anything after last_event_id first."""
+    subscription = Subscription(user_id, 0)
+    # Subscribe before reading the log so nothing committed in between is missed.
+    _subscribers[user_id].add(subscription)
+    try:
+        yield f"retry: {RETRY_MILLISECONDS}\n\n"
+        if last_event_id is None:
+            subscription.last_id = await latest_event_id(user_id)
+        else:
+            subscription.last_id = last_event_id
+            for event in await events_after(user_id, last_event_id):
+                subscription.last_id = event["id"]
+                yield format_event(event)
+
+        while True:
+            if subscription.overflowed and subscription.queue.empty():
+                return
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": heartbeat\n\n"
+                continue
+            if event["id"] <= subscription.last_id:
+                continue
+            subscription.last_id = event["id"]
+            yield format_event(event)
+    finally:
+        _subscribers[user_id].discard(subscription)
+        if not _subscribers[user_id]:
+            del _subscribers[user_id]
+
+def metric_lines() -> list:
+    return ["# TYPE order_event_streams gauge", f"order_event_streams {sum(len(subs) for subs in _subscribers.values())}"]
@@ -0,0 +1,97 @@
+from datetime import timedelta
+from app.services.prisma_client import prisma_client
+
+# Running totals kept beside Order/OrderItem so stats reads never scan order history.
+# Every order counts toward user spend and product sales unless it is cancelled;
+# OrderStatusCount tracks all orders by their current status.
+
+CANCELLED = "cancelled"
+BACKFILL_TIMEOUT = timedelta(minutes=30)
+
+async def _add_user(tx, order, sign: int):
+    await tx.execute_raw(
+        'INSERT INTO "UserOrderStats" AS s ("userId", "orderCount", "totalSpent", "lastOrderAt", "updatedAt") '
+        "VALUES ($1, $2::int, $3::float8, ($4::timestamptz AT TIME ZONE 'UTC'), now()) "
+        'ON CONFLICT ("userId") DO UPDATE SET '
+        '"orderCount" = s."orderCount" + EXCLUDED."orderCount", '
+        '"totalSpent" = s."totalSpent" + EXCLUDED."totalSpent", '
+        '"lastOrderAt" = GREATEST(s."lastOrderAt", EXCLUDED."lastOrderAt"), '
+        '"updatedAt" = now()',
+        order.userId, sign, sign * order.totalPrice, order.createdAt.isoformat()
+    )
+
+async def _add_sales(tx, order, items, sign: int):
+    totals = {}
+    for item in items:
+        if item.productId:
+            units, revenue = totals.get(item.productId, (0, 0.0))
+            totals[item.productId] = (units + item.quantity, revenue + item.quantity * item.price)
+    if not totals:
+        return
+    values = []
+    params = [order.createdAt.isoformat()]
+    for product_id, (units, revenue) in totals.items():
+        values.append(f"(${len(params) + 1}, (($1::timestamptz AT TIME ZONE 'UTC'))::date, ${len(params) + 2}::int, ${len(params) + 3}::float8)")
+        params.extend([product_id, sign * units, sign * revenue])
+    await tx.execute_raw(
+        'INSERT INTO "ProductDailySales" AS s ("productId", "day", "units", "revenue") '
+        f'VALUES {", ".join(values)} '
+        'ON CONFLICT ("productId", "day") DO UPDATE SET '
+        '"units" = s."units" + EXCLUDED."units", "revenue" = s."revenue" + EXCLUDED."revenue"',
+        *params
+    )
+
+async def _add_status(tx, status: str, delta: int):
+    await tx.execute_raw(
+        'INSERT INTO "OrderStatusCount" AS s ("status", "count") VALUES ($1, $2::int) '
+        'ON CONFLICT ("status") DO UPDATE SET "count" = s."count" + EXCLUDED."count"',
+        status, delta
+    )
+
+async def record_order(tx, order, items):
+    """Count a newly created order; call inside the transaction that creates it."""
+    await _add_status(tx, order.status, 1)
+    if order.status != CANCELLED:
+        await _add_user(tx, order, 1)
+        await _add_sales(tx, order, items, 1)
+
+async def record_status_change(tx, order, old_status: str, new_status: str):
+    """Move an order between statuses; cancelling (or reinstating) reverses its sales."""
+    if old_status == new_status:
+        return
+    await _add_status(tx, old_status, -1)
+    await _add_status(tx, new_status, 1)
+    if CANCELLED in (old_status, new_status):
+        sign = -1 if new_status == CANCELLED else 1
+        items = await tx.orderitem.find_many(where={"orderId": order.id})
+        await _add_user(tx, order, sign)
+        await _add_sales(tx, order, items, sign)
+
+BACKFILL_STATEMENTS = [
+    # Blocks order writes, not reads, until the rebuilt totals commit.
+    'LOCK TABLE "Order", "OrderItem" IN SHARE MODE',
+    'DELETE FROM "UserOrderStats"',
+    'DELETE FROM "ProductDailySales"',
+    'DELETE FROM "OrderStatusCount"',
+    '''INSERT INTO "UserOrderStats" ("userId", "orderCount", "totalSpent", "lastOrderAt", "updatedAt")
+       SELECT "userId", count(*), sum("totalPrice"), max("createdAt"), now()
+       FROM "Order" WHERE "status" <> 'cancelled' GROUP BY "userId"''',
+    '''INSERT INTO "ProductDailySales" ("productId", "day", "units", "revenue")
+       SELECT i."productId", o."createdAt"::date, sum(i."quantity"), sum(i."quantity" * i."price")
+       FROM "OrderItem" i JOIN "Order" o ON o."id" = i."orderId"
+       WHERE i."productId" IS NOT NULL AND o."status" <> 'cancelled'
+       GROUP BY i."productId", o."createdAt"::date''',
+    '''INSERT INTO "OrderStatusCount" ("status", "count")
+       SELECT "status", count(*) FROM "Order" GROUP BY "status"''',
+]
+
+async def backfill() -> dict:
+    """Recompute every aggregate from Order/OrderItem in one transaction."""
+    async with prisma_client.tx(timeout=BACKFILL_TIMEOUT) as tx:
+        for statement in BACKFILL_STATEMENTS:
+            await tx.execute_raw(statement)
+        return {
+            "users": await tx.userorderstats.count(),
+            "product_days": await tx.productdailysales.count(),
+            "statuses": await tx.orderstatuscount.count(),
+        }
@@ -0,0 +1,69 @@
+import base64
+import json
+from datetime import datetime
+from fastapi import HTTPException
+from app.services.entity_cache import EntityCache
+
+# Listings are ordered newest first; id breaks ties between rows sharing a createdAt.
+KEYSET_ORDER = [{"createdAt": "desc"}, {"id": "desc"}]
+COUNT_TTL_SECONDS = 30
+MAX_PAGE_SIZE = 100
+
+# Keyed by client-chosen filters, so bounded like the other caches.
+_count_cache = EntityCache(maxsize=1024, ttl=COUNT_TTL_SECONDS)
+
+def encode_keys(*values) -> str:
+    raw = json.dumps(values).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_keys(cursor: str) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def encode_cursor(row) -> str:
+    return encode_keys(row.createdAt.isoformat(), row.id)
+
+def decode_cursor(cursor: str):
+    try:
+        created_at, row_id = decode_keys(cursor)
+        return datetime.fromisoformat(created_at), row_id
+    except HTTPException:
+        raise
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def keyset_after(where: dict, created_at: datetime, row_id: str) -> dict:
+    return {
+        **where,
+        "OR": [
+            {"createdAt": {"lt": created_at}},
+            {"createdAt": created_at, "id": {"lt": row_id}},
+        ],
+    }
+
+def keyset_where(where: dict, cursor: str) -> dict:
+    created_at, row_id = decode_cursor(cursor)
+    return keyset_after(where, created_at, row_id)
+
+async def cached_count(model, where: dict) -> int:
+    key = (type(model).__name__, json.dumps(where, sort_keys=True, default=str))
+    total = _count_cache.get(key)
+    if total is None:
+        total = await model.count(where=where)
+        _count_cache.set(key, total)
+    return total
+
+async def keyset_page(model, where: dict, limit: int, cursor: str = None, include_total: bool = False) -> dict:
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    page_where = keyset_where(where, cursor) if cursor else where
+    rows = await model.find_many(where=page_where, take=limit + 1, order=KEYSET_ORDER)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    result = {"data": rows, "next_cursor": encode_cursor(rows[-1]) if has_more else None}
+    if include_total:
+        result["total"] = await cached_count(model, where)
+    return result
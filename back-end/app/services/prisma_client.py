@@ -1,3 +1,55 @@
+import prisma
 from prisma import Prisma
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from app.config import get_settings
+from app.services.metrics import record_query
+import time
 
-prisma_client = Prisma()
+settings = get_settings()
+
+# Per-request DB timing (Server-Timing, db_queries_per_request) wraps Prisma._execute,
+# a private method of prisma-client-py that every model action and raw query goes
+# through. It is patched on the class rather than a subclass because tx() builds its
+# clients with Prisma(...) directly. get_metrics() only has process-wide totals, so it
+# can't attribute queries to a request. The signature has only been checked against
+# TIMED_PRISMA_VERSIONS; on any other version timing is left off instead of guessing.
+TIMED_PRISMA_VERSIONS = ("0.11.0",)
+
+def _install_query_timing() -> bool:
+    execute = getattr(Prisma, "_execute", None)
+    version = getattr(prisma, "__version__", None)
+    if execute is None or version not in TIMED_PRISMA_VERSIONS:
+        print(f"Warning: DB query timing disabled for prisma {version}")
+        return False
+
+    async def _timed_execute(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await execute(self, *args, **kwargs)
+        finally:
+            model = kwargs.get("model")
+            record_query(getattr(model, "__name__", None), kwargs.get("method", "query"), time.perf_counter() - started)
+
+    Prisma._execute = _timed_execute
+    return True
+
+query_timing = _install_query_timing()
+
+def pool_size() -> int:
+    # Each worker also holds one LISTEN connection for cache invalidation.
+    return max(2, settings.DB_CONNECTION_BUDGET // max(1, settings.WEB_WORKERS) - 1)
+
+def pooled_url(url: str) -> str:
+    parts = urlsplit(url)
+    query = dict(parse_qsl(parts.query))
+    query.update(connection_limit=str(pool_size()), pool_timeout=str(settings.DB_POOL_TIMEOUT))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+def _client(url: str = None) -> Prisma:
+    if settings.DB_CONNECTION_BUDGET:
+        url = pooled_url(url or settings.DATABASE_URL)
+    return Prisma(datasource={"url": url} if url else None, log_queries=settings.DB_LOG_QUERIES)
+
+prisma_client = _client()
+# Read-only replica for catalog reads; app.services.replica decides when it is used.
+read_client = _client(settings.DATABASE_READ_URL) if settings.DATABASE_READ_URL else None
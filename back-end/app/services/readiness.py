@@ -0,0 +1,50 @@
+import asyncio
+from app.services.prisma_client import prisma_client
+
+# Startup work runs in the background so the process answers /health/live at once;
+# /health/ready (and admission control) hold traffic back until every step is done.
+
+RETRY_SECONDS = 2
+DB_CHECK_TIMEOUT = 2.0
+
+steps = {}  # step name -> done
+_task = None
+
+def is_ready() -> bool:
+    return bool(steps) and all(steps.values())
+
+def pending() -> list:
+    return [name for name, done in steps.items() if not done]
+
+async def _run(named_steps):
+    for name, step in named_steps:
+        while True:
+            try:
+                await step()
+                break
+            except Exception as e:
+                print(f"Startup step {name} failed, retrying: {e}")
+                await asyncio.sleep(RETRY_SECONDS)
+        steps[name] = True
+
+def start(named_steps):
+    """Run (name, coroutine function) steps in order, retrying each until it succeeds."""
+    global _task
+    for name, _ in named_steps:
+        steps[name] = False
+    _task = asyncio.create_task(_run(named_steps))
+
+async def stop():
+    global _task
+    if _task:
+        _task.cancel()
+        _task = None
+
+async def database_ok() -> bool:
+    if not prisma_client.is_connected():
+        return False
+    try:
+        await asyncio.wait_for(prisma_client.query_raw("SELECT 1 AS ok"), DB_CHECK_TIMEOUT)
+        return True
+    except Exception:
+        return False
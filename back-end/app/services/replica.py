@@ -0,0 +1,114 @@
+import asyncio
+import time
+from fastapi import HTTPException
+from app.config import get_settings
+from app.services.prisma_client import prisma_client, read_client
+from app.services.metrics import Counter, Gauge
+from app.services import listing_cache
+
+# Catalog reads go to the replica only while it is reachable, within
+# REPLICA_MAX_LAG_SECONDS, and no catalog write happened in the last
+# REPLICA_STICKY_SECONDS. The last rule gives writers read-your-writes, and because
+# replica results fill listing and entity caches that everyone shares it is kept
+# catalog-wide rather than per user. catalog_version is a time_ns no older than the
+# last write this worker knows of, its own or a peer's from the invalidation
+# broadcast, so the window holds on every worker.
+
+settings = get_settings()
+
+CHECK_INTERVAL_SECONDS = 2
+CHECK_TIMEOUT = 1.0
+# Lag samples older than this are not trusted; between samples the replica may fall
+# this much further behind than it last reported.
+MAX_SAMPLE_AGE = CHECK_INTERVAL_SECONDS + 2 * CHECK_TIMEOUT
+LAG_QUERY = '''
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp())
+    END::float8 AS lag
+'''
+
+healthy = False
+lag = None
+checked_at = 0.0
+_task = None
+
+reads = Counter("db_catalog_reads_total", "Catalog reads by the database that served them.", ("target",))
+replica_lag = Gauge("db_replica_lag_seconds", "Replication delay last measured on the read replica.")
+replica_healthy = Gauge("db_replica_healthy", "1 while the read replica is reachable and within the lag limit.")
+
+def sticky_seconds() -> float:
+    # Shorter than the worst lag a healthy replica can have, the window would let a
+    # pre-write row be read back and cached under the new catalog version.
+    return max(settings.REPLICA_STICKY_SECONDS, settings.REPLICA_MAX_LAG_SECONDS + MAX_SAMPLE_AGE)
+
+def recently_written() -> bool:
+    written_at = int(listing_cache.catalog_version, 16)
+    return time.time_ns() - written_at < sticky_seconds() * 1e9
+
+def reader():
+    """The client catalog reads should use right now."""
+    if read_client is None or not healthy or time.monotonic() - checked_at > MAX_SAMPLE_AGE or recently_written():
+        return prisma_client
+    return read_client
+
+async def check() -> bool:
+    global healthy, lag, checked_at
+    try:
+        if not read_client.is_connected():
+            await asyncio.wait_for(read_client.connect(), CHECK_TIMEOUT * 5)
+        rows = await asyncio.wait_for(read_client.query_raw(LAG_QUERY), CHECK_TIMEOUT)
+        lag = rows[0]["lag"]
+        healthy = lag is not None and lag <= settings.REPLICA_MAX_LAG_SECONDS
+        checked_at = time.monotonic()
+    except Exception as e:
+        if healthy:
+            print(f"Read replica unavailable, reading from the primary: {e}")
+        healthy, lag = False, None
+    return healthy
+
+async def read(query):
+    """Await query(client) on the reader, retrying on the primary if the replica fails."""
+    client = reader()
+    if client is prisma_client:
+        reads.inc(("primary",))
+        return await query(prisma_client)
+    try:
+        result = await query(client)
+        reads.inc(("replica",))
+        return result
+    except HTTPException:
+        raise
+    except Exception:
+        # Only a replica that fails its own health check is worth a second attempt;
+        # anything else would fail on the primary too.
+        if await check():
+            raise
+        reads.inc(("primary",))
+        return await query(prisma_client)
+
+async def _monitor():
+    while True:
+        await check()
+        await asyncio.sleep(CHECK_INTERVAL_SECONDS)
+
+def start_monitor():
+    global _task
+    if _task is None and read_client is not None:
+        _task = asyncio.create_task(_monitor())
+
+async def stop_monitor():
+    global _task
+    if _task:
+        _task.cancel()
+        _task = None
+    if read_client is not None and read_client.is_connected():
+        await read_client.disconnect()
+
+def metric_lines() -> list:
+    if read_client is None:
+        return reads.render()
+    replica_lag.set((), lag if lag is not None else -1)
+    replica_healthy.set((), 1 if healthy else 0)
+    return reads.render() + replica_lag.render() + replica_healthy.render()
@@ -0,0 +1,184 @@
+from bisect import bisect_left
+from collections import defaultdict
+from app.services.prisma_client import prisma_client
+import asyncio
+import re
+
+# In-process fallback for catalog search when Postgres full-text search is unavailable.
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+EXACT_WEIGHT = 1.0
+PREFIX_WEIGHT = 0.7
+TYPO_WEIGHT = 0.5
+MIN_TYPO_LENGTH = 4
+LOAD_PAGE_SIZE = 5000
+
+PET_FIELDS = {"name": 2.0, "breed": 1.5, "description": 1.0, "personality": 1.0}
+PRODUCT_FIELDS = {"name": 2.0, "brand": 1.5, "description": 1.0, "filters": 1.0}
+
+def tokenize(text) -> list:
+    if text is None:
+        return []
+    if isinstance(text, (list, tuple)):
+        text = " ".join(text)
+    return TOKEN_RE.findall(text.lower())
+
+def _deletes(term: str) -> set:
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+def search_card(kind: str, row) -> dict:
+    return {
+        "kind": kind,
+        "id": row.id,
+        "name": row.name,
+        "price": row.price,
+        "image": row.images[0] if row.images else None,
+        "subtitle": row.breed if kind == "pet" else row.brand,
+    }
+
+class InvertedIndex:
+    def __init__(self):
+        self.loaded = False
+        self._postings = defaultdict(dict)  # term -> {doc key: field weight}
+        self._deletes = defaultdict(set)    # one-char deletion -> terms
+        self._docs = {}                     # doc key -> (card, terms, searchable)
+        self._terms = []
+        self._terms_dirty = False
+
+    def add(self, kind: str, row):
+        key = (kind, row.id)
+        self.remove(kind, row.id)
+        fields = PET_FIELDS if kind == "pet" else PRODUCT_FIELDS
+        weights = {}
+        for field, weight in fields.items():
+            for term in tokenize(getattr(row, field, None)):
+                weights[term] = max(weights.get(term, 0), weight)
+        for term, weight in weights.items():
+            if term not in self._postings:
+                self._terms_dirty = True
+                for deleted in _deletes(term):
+                    self._deletes[deleted].add(term)
+            self._postings[term][key] = weight
+        searchable = row.available if kind == "pet" else True
+        self._docs[key] = (search_card(kind, row), list(weights), searchable)
+
+    def remove(self, kind: str, row_id: str):
+        key = (kind, row_id)
+        doc = self._docs.pop(key, None)
+        if not doc:
+            return
+        for term in doc[1]:
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(key, None)
+            if not postings:
+                del self._postings[term]
+                self._terms_dirty = True
+                for deleted in _deletes(term):
+                    self._deletes[deleted].discard(term)
+
+    def _sorted_terms(self) -> list:
+        if self._terms_dirty:
+            self._terms = sorted(self._postings)
+            self._terms_dirty = False
+        return self._terms
+
+    def _expand(self, token: str) -> dict:
+        """Map index terms matching a query token to how well they match it."""
+        matches = {}
+        terms = self._sorted_terms()
+        i = bisect_left(terms, token)
+        while i < len(terms) and terms[i].startswith(token):
+            matches[terms[i]] = EXACT_WEIGHT if terms[i] == token else PREFIX_WEIGHT
+            i += 1
+        if len(token) >= MIN_TYPO_LENGTH:
+            # Symmetric delete neighbourhood: catches single insertions, deletions and substitutions.
+            candidates = set(self._deletes.get(token, ()))
+            for deleted in _deletes(token):
+                if deleted in self._postings:
+                    candidates.add(deleted)
+                candidates |= self._deletes.get(deleted, set())
+            for term in candidates:
+                matches.setdefault(term, TYPO_WEIGHT)
+        return matches
+
+    def search(self, query: str, kinds: set, limit: int, after=None) -> list:
+        scores = None
+        for token in tokenize(query):
+            token_scores = {}
+            for term, match_weight in self._expand(token).items():
+                for key, field_weight in self._postings[term].items():
+                    score = match_weight * field_weight
+                    if score > token_scores.get(key, 0):
+                        token_scores[key] = score
+            if scores is None:
+                scores = token_scores
+            else:
+                # Every query token has to match something in the document.
+                scores = {key: scores[key] + s for key, s in token_scores.items() if key in scores}
+            if not scores:
+                return []
+
+        results = []
+        for key, score in (scores or {}).items():
+            card, _, searchable = self._docs[key]
+            if key[0] not in kinds or not searchable:
+                continue
+            score = round(score, 6)
+            if after and (score, key[1]) >= tuple(after):
+                continue
+            results.append((score, key[1], card))
+        results.sort(key=lambda r: (r[0], r[1]), reverse=True)
+        return [{**card, "score": score} for score, _, card in results[:limit]]
+
+index = InvertedIndex()
+_loading = None
+
+async def _load() -> InvertedIndex:
+    fresh = InvertedIndex()
+    for kind, table in (("pet", prisma_client.pet), ("product", prisma_client.product)):
+        after = None
+        while True:
+            page = await table.find_many(
+                take=LOAD_PAGE_SIZE, order={"id": "asc"},
+                **({"cursor": {"id": after}, "skip": 1} if after else {})
+            )
+            for row in page:
+                fresh.add(kind, row)
+            if len(page) < LOAD_PAGE_SIZE:
+                break
+            after = page[-1].id
+    fresh.loaded = True
+    return fresh
+
+async def ensure_loaded():
+    global index
+    if not index.loaded:
+        index = await _load()
+
+async def _load_quietly():
+    try:
+        await ensure_loaded()
+    except Exception as e:
+        print(f"Search index load failed: {e}")
+
+def load_in_background():
+    """Start loading the index off the request path; a no-op while loaded or loading."""
+    global _loading
+    if not index.loaded and (_loading is None or _loading.done()):
+        _loading = asyncio.create_task(_load_quietly())
+
+async def rebuild():
+    """Reload a loaded index from scratch, e.g. after a bulk import."""
+    global index
+    if index.loaded:
+        index = await _load()
+
+def upsert(kind: str, row):
+    if index.loaded:
+        index.add(kind, row)
+
+def discard(kind: str, row_id: str):
+    if index.loaded:
+        index.remove(kind, row_id)
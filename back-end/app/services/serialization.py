@@ -0,0 +1,36 @@
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from app.schemas import PetResponse, ProductResponse, PetCard, ProductCard
+from app.services import metrics
+import orjson
+import time
+
+# Fields exposed by the public response schemas; Prisma rows also carry relation attributes.
+PET_FIELDS = tuple(PetResponse.model_fields)
+PRODUCT_FIELDS = tuple(ProductResponse.model_fields)
+PET_CARD_FIELDS = tuple(PetCard.model_fields)
+PRODUCT_CARD_FIELDS = tuple(ProductCard.model_fields)
+
+def _default(value):
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+def encode(content) -> bytes:
+    started = time.perf_counter()
+    body = orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    metrics.record_serialize(time.perf_counter() - started)
+    return body
+
+class FastJSONResponse(JSONResponse):
+    """orjson-encoded response; also the app default so plain routes get the faster encoder."""
+
+    def render(self, content) -> bytes:
+        return encode(content)
+
+def project(row, fields: tuple) -> dict:
+    return {field: getattr(row, field) for field in fields}
+
+def listing_payload(page: dict, fields: tuple) -> dict:
+    # Rows come straight from the database, so response_model validation is skipped.
+    return {**page, "data": [project(row, fields) for row in page["data"]]}
@@ -0,0 +1,330 @@
+import asyncio
+import fcntl
+import math
+import os
+import time
+import zlib
+from starlette.concurrency import run_in_threadpool
+from app.config import get_settings
+from app.services.prisma_client import prisma_client
+
+# Feature vectors for "similar pets / related products". Matches never cross species
+# (pets) or category (products), so each kind is stored as one float32 matrix per such
+# bucket and a lookup scans only the query's own bucket.
+#
+# A bucket lives in SIMILARITY_DIR as a generation directory holding vectors.f32 (a
+# capacity x DIMENSIONS memmap) and ids.txt (row ids, one per line, append-only), plus
+# a <kind>.<bucket>.current pointer naming the live generation. Workers map the same
+# files, so each matrix sits once in the page cache and a row written by one worker is
+# visible to the others immediately. Writers serialise on a per-kind flock; a vector is
+# written before its id is appended, so readers never see an id without its row.
+#
+# numpy is imported where it is used so importing the app (and the routes that call
+# into this module) does not pay for it; the startup build loads it soon after.
+
+settings = get_settings()
+
+DIMENSIONS = 64
+NUMERIC_DIMENSIONS = 3
+HASHED_DIMENSIONS = DIMENSIONS - NUMERIC_DIMENSIONS
+MIN_CAPACITY = 1024
+BUILD_PAGE_SIZE = 5000
+LOCK_POLL_SECONDS = 0.05
+PROCESS_STARTED = time.time()
+
+def _hashed(vector, feature: str, weight: float):
+    # crc32 rather than hash(): the layout must agree across processes and restarts.
+    vector[zlib.crc32(feature.encode()) % HASHED_DIMENSIONS] += weight
+
+def _spread(vector, prefix: str, values, weight: float):
+    values = [value for value in values or [] if value]
+    for value in values:
+        _hashed(vector, f"{prefix}:{value.lower()}", weight / math.sqrt(len(values)))
+
+def _scaled(value, ceiling: float) -> float:
+    return math.log1p(max(value or 0, 0)) / math.log1p(ceiling)
+
+def _normalized(vector):
+    import numpy as np
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+def pet_vector(pet):
+    import numpy as np
+    vector = np.zeros(DIMENSIONS, dtype=np.float32)
+    _hashed(vector, f"species:{pet.species.lower()}", 3.0)
+    _hashed(vector, f"breed:{pet.breed.lower()}", 2.0)
+    _spread(vector, "personality", pet.personality, 1.0)
+    vector[HASHED_DIMENSIONS] = (pet.age or 0) / 15
+    vector[HASHED_DIMENSIONS + 1] = _scaled(pet.weight, 50)
+    vector[HASHED_DIMENSIONS + 2] = _scaled(pet.price, 5000)
+    return _normalized(vector)
+
+def product_vector(product):
+    import numpy as np
+    vector = np.zeros(DIMENSIONS, dtype=np.float32)
+    _hashed(vector, f"category:{product.category.lower()}", 3.0)
+    if product.petType:
+        _hashed(vector, f"pettype:{product.petType.lower()}", 2.0)
+    if product.brand:
+        _hashed(vector, f"brand:{product.brand.lower()}", 1.5)
+    _spread(vector, "filter", product.filters, 1.0)
+    vector[HASHED_DIMENSIONS + 2] = _scaled(product.price, 500)
+    return _normalized(vector)
+
+def _listed(kind: str, row) -> bool:
+    return row.available if kind == "pet" else True
+
+def bucket_key(value: str) -> str:
+    return format(zlib.crc32((value or "").lower().encode()), "08x")
+
+class VectorStore:
+    """One bucket's matrix, used from the event loop only. Callers writing to it hold the kind's lock."""
+
+    def __init__(self, name: str, directory: str):
+        self.name = name
+        self.directory = directory
+        self.pointer = os.path.join(directory, f"{name}.current")
+        self.generation = None
+        self.matrix = None
+        self.ids = []
+        self.rows = {}
+        self._ids_offset = 0
+        self._pointer_mtime = None
+
+    def _path(self, generation: str, name: str) -> str:
+        return os.path.join(self.directory, f"{self.name}-{generation}", name)
+
+    def _open(self, generation: str):
+        self.generation = generation
+        self.ids, self.rows, self._ids_offset = [], {}, 0
+        self._map()
+        self._read_ids()
+
+    def _map(self):
+        import numpy as np
+        path = self._path(self.generation, "vectors.f32")
+        capacity = os.path.getsize(path) // (DIMENSIONS * 4)
+        self.matrix = np.memmap(path, dtype=np.float32, mode="r+", shape=(capacity, DIMENSIONS))
+
+    def _read_ids(self):
+        with open(self._path(self.generation, "ids.txt"), "rb") as f:
+            f.seek(self._ids_offset)
+            chunk = f.read()
+        # Only complete lines count; a writer may be midway through appending one.
+        complete = chunk[:chunk.rfind(b"\n") + 1]
+        for line in complete.decode().splitlines():
+            self.rows[line] = len(self.ids)
+            self.ids.append(line)
+        self._ids_offset += len(complete)
+        if len(self.ids) > len(self.matrix):
+            self._map()
+
+    def refresh(self) -> bool:
+        """Follow other workers' writes; returns False until a generation exists."""
+        try:
+            mtime = os.stat(self.pointer).st_mtime_ns
+        except FileNotFoundError:
+            return False
+        if mtime != self._pointer_mtime:
+            with open(self.pointer) as f:
+                generation = f.read().strip()
+            self._pointer_mtime = mtime
+            if generation != self.generation:
+                self._open(generation)
+        elif os.path.getsize(self._path(self.generation, "ids.txt")) != self._ids_offset:
+            self._read_ids()
+        return True
+
+    def write_generation(self, ids: list, vectors: list):
+        """Replace the bucket's contents and drop the generation it replaces."""
+        import numpy as np
+        self.refresh()
+        previous = self.generation
+        generation = format(time.time_ns(), "x")
+        os.makedirs(os.path.join(self.directory, f"{self.name}-{generation}"))
+        capacity = max(MIN_CAPACITY, int(len(ids) * 1.25))
+        matrix = np.memmap(self._path(generation, "vectors.f32"), dtype=np.float32, mode="w+", shape=(capacity, DIMENSIONS))
+        if vectors:
+            matrix[:len(vectors)] = vectors
+        matrix.flush()
+        del matrix
+        with open(self._path(generation, "ids.txt"), "w") as f:
+            f.write("".join(f"{row_id}\n" for row_id in ids))
+        with open(f"{self.pointer}.tmp", "w") as f:
+            f.write(generation)
+        os.replace(f"{self.pointer}.tmp", self.pointer)
+        self.refresh()
+        if previous and previous != generation:
+            self._remove_generation(previous)
+
+    def _remove_generation(self, generation: str):
+        # Workers still mapping the old files keep their pages until they follow the pointer.
+        for name in ("vectors.f32", "ids.txt"):
+            try:
+                os.remove(self._path(generation, name))
+            except FileNotFoundError:
+                pass
+        try:
+            os.rmdir(os.path.join(self.directory, f"{self.name}-{generation}"))
+        except OSError:
+            pass
+
+    def write(self, row_id: str, vector):
+        """Set a row's vector, appending it if new; None zeroes an existing row."""
+        self.refresh()
+        index = self.rows.get(row_id)
+        if index is None:
+            if vector is None:
+                return
+            index = len(self.ids)
+            if index >= len(self.matrix):
+                with open(self._path(self.generation, "vectors.f32"), "r+b") as f:
+                    f.truncate(len(self.matrix) * 2 * DIMENSIONS * 4)
+                self._map()
+            self.matrix[index] = vector
+            with open(self._path(self.generation, "ids.txt"), "a") as f:
+                f.write(f"{row_id}\n")
+            self._read_ids()
+        else:
+            # Deleted, unlisted and moved rows stay as zero vectors, which never score.
+            self.matrix[index] = 0 if vector is None else vector
+
+    def nearest(self, vector, limit: int, exclude: str = None) -> list:
+        """Top-k rows by cosine similarity as (id, score), best first."""
+        import numpy as np
+        if not self.refresh() or not self.ids:
+            return []
+        count = len(self.ids)
+        scores = self.matrix[:count] @ vector
+        if exclude in self.rows:
+            scores[self.rows[exclude]] = -1
+        k = min(limit, count)
+        top = np.argpartition(scores, count - k)[count - k:]
+        top = top[np.argsort(-scores[top])]
+        return [(self.ids[i], float(scores[i])) for i in top if scores[i] > 0]
+
+class SimilarityIndex:
+    def __init__(self, kind: str, encode, bucket_field: str, directory: str):
+        self.kind = kind
+        self.encode = encode
+        self.bucket_field = bucket_field
+        self.directory = directory
+        self.lock_path = os.path.join(directory, f"{kind}.lock")
+        # Touched after every full build; until it exists writes are left to the build.
+        self.marker = os.path.join(directory, f"{kind}.built")
+        self.buckets = {}
+
+    def bucket_of(self, row) -> str:
+        return bucket_key(getattr(row, self.bucket_field))
+
+    def store(self, key: str) -> VectorStore:
+        store = self.buckets.get(key)
+        if store is None:
+            store = self.buckets[key] = VectorStore(f"{self.kind}.{key}", self.directory)
+        return store
+
+    def _keys_on_disk(self) -> list:
+        prefix = f"{self.kind}."
+        return [
+            name[len(prefix):-len(".current")] for name in os.listdir(self.directory)
+            if name.startswith(prefix) and name.endswith(".current")
+        ]
+
+    async def _locked(self):
+        # Polled rather than blocking so waiting on another worker's rebuild never stalls the loop.
+        os.makedirs(self.directory, exist_ok=True)
+        handle = open(self.lock_path, "w")
+        while True:
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return handle
+            except BlockingIOError:
+                await asyncio.sleep(LOCK_POLL_SECONDS)
+
+    async def build(self, table, force: bool = False):
+        """Rewrite every bucket from the database, unless that was done since this process started."""
+        handle = await self._locked()
+        try:
+            if not force and os.path.exists(self.marker) and os.path.getmtime(self.marker) >= PROCESS_STARTED:
+                return
+            rows, after = [], None
+            while True:
+                page = await table.find_many(
+                    take=BUILD_PAGE_SIZE, order={"id": "asc"},
+                    **({"cursor": {"id": after}, "skip": 1} if after else {})
+                )
+                rows += page
+                if len(page) < BUILD_PAGE_SIZE:
+                    break
+                after = page[-1].id
+            # Only the encoding runs in a thread: the stores are shared with lookups on
+            # the event loop and are not safe to touch from two threads at once.
+            grouped = await run_in_threadpool(self.encode_all, rows)
+            self.write_all(grouped)
+        finally:
+            handle.close()
+
+    def encode_all(self, rows) -> dict:
+        """Listed rows' vectors grouped by bucket: key -> (ids, vectors)."""
+        grouped = {}
+        for row in rows:
+            if _listed(self.kind, row):
+                ids, vectors = grouped.setdefault(self.bucket_of(row), ([], []))
+                ids.append(row.id)
+                vectors.append(self.encode(row))
+        return grouped
+
+    def write_all(self, grouped: dict):
+        # Buckets that no longer have rows are emptied rather than left stale.
+        for key in self._keys_on_disk():
+            grouped.setdefault(key, ([], []))
+        for key, (ids, vectors) in grouped.items():
+            self.store(key).write_generation(ids, vectors)
+        with open(self.marker, "w"):
+            pass
+
+    async def upsert(self, row):
+        vector = self.encode(row) if _listed(self.kind, row) else None
+        await self._write(row.id, vector, self.bucket_of(row))
+
+    async def discard(self, row_id: str):
+        await self._write(row_id, None, None)
+
+    async def _write(self, row_id: str, vector, key):
+        if not os.path.exists(self.marker):
+            return
+        handle = await self._locked()
+        try:
+            # A species or category change moves the row, so clear it from every other bucket.
+            for other in self._keys_on_disk():
+                if other != key or vector is None:
+                    self.store(other).write(row_id, None)
+            if vector is not None:
+                store = self.store(key)
+                if not store.refresh():
+                    store.write_generation([], [])
+                store.write(row_id, vector)
+        finally:
+            handle.close()
+
+    def similar(self, row, limit: int) -> list:
+        return self.store(self.bucket_of(row)).nearest(self.encode(row), limit, exclude=row.id)
+
+indexes = {
+    "pet": SimilarityIndex("pet", pet_vector, "species", settings.SIMILARITY_DIR),
+    "product": SimilarityIndex("product", product_vector, "category", settings.SIMILARITY_DIR),
+}
+
+async def build(force: bool = False):
+    await indexes["pet"].build(prisma_client.pet, force)
+    await indexes["product"].build(prisma_client.product, force)
+
+async def upsert(kind: str, row):
+    await indexes[kind].upsert(row)
+
+async def discard(kind: str, row_id: str):
+    await indexes[kind].discard(row_id)
+
+def similar(kind: str, row, limit: int) -> list:
+    return indexes[kind].similar(row, limit)
@@ -0,0 +1,79 @@
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+from app.services.prisma_client import prisma_client
+import hashlib
+import os
+import tempfile
+
+CHUNK_SIZE = 1024 * 1024  # 1MB
+
+class UploadTooLarge(Exception):
+    pass
+
+def _write_chunk(out, digest, chunk: bytes):
+    digest.update(chunk)
+    out.write(chunk)
+
+async def _file_chunks(file: UploadFile):
+    while chunk := await file.read(CHUNK_SIZE):
+        yield chunk
+
+async def stream_to_disk(file: UploadFile, directory: str, max_size: int):
+    """Copy an upload to a temp file in chunks; returns (temp_path, sha256_hex, size)."""
+    return await stream_chunks_to_disk(_file_chunks(file), directory, max_size)
+
+async def stream_chunks_to_disk(chunks, directory: str, max_size: int):
+    """Like stream_to_disk for any async iterator of bytes, e.g. Request.stream()."""
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".part")
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLarge()
+                await run_in_threadpool(_write_chunk, out, digest, chunk)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+    return temp_path, digest.hexdigest(), size
+
+# A stored file and its Upload row change together under the row lock: stores take it
+# with the upsert, releases with SELECT ... FOR UPDATE, and both touch the file before
+# committing, so a release can never unlink a file a concurrent store just referenced.
+UPSERT_REFERENCE = '''
+    INSERT INTO "Upload" ("filename", "hash", "size", "refCount") VALUES ($1, $2, $3, 1)
+    ON CONFLICT ("filename") DO UPDATE SET "refCount" = "Upload"."refCount" + 1
+'''
+
+async def store_content_addressed(temp_path: str, digest: str, ext: str, size: int, directory: str) -> str:
+    filename = f"{digest}.{ext}"
+    async with prisma_client.tx() as tx:
+        await tx.execute_raw(UPSERT_REFERENCE, filename, digest, size)
+        await run_in_threadpool(os.replace, temp_path, os.path.join(directory, filename))
+    return filename
+
+async def release_upload(filename: str, directory: str) -> int:
+    """Drop one reference to a stored file and unlink it once none remain."""
+    file_path = os.path.join(directory, filename)
+    async with prisma_client.tx() as tx:
+        rows = await tx.query_raw(
+            'SELECT "refCount" FROM "Upload" WHERE "filename" = $1 FOR UPDATE', filename
+        )
+        if not rows:
+            # Uploaded before content addressing; nothing else can reference it.
+            await run_in_threadpool(os.remove, file_path)
+            return 0
+
+        if rows[0]["refCount"] > 1:
+            record = await tx.upload.update(
+                where={"filename": filename},
+                data={"refCount": {"decrement": 1}}
+            )
+            return record.refCount
+
+        await tx.upload.delete(where={"filename": filename})
+        if os.path.exists(file_path):
+            await run_in_threadpool(os.remove, file_path)
+    return 0
@@ -0,0 +1,88 @@
+import json
+from collections import OrderedDict
+from app.services.prisma_client import prisma_client
+from app.services.metrics import Counter
+from app.services import invalidation
+
+# Per-user sets of wishlisted product and pet ids for the hearts on listing cards.
+# A user's set is loaded with one query, kept in an LRU bounded by MAX_USERS and
+# patched in place by this worker's writes; other workers drop the user when they
+# hear about the write on CHANNEL.
+
+CHANNEL = "petbloom_wishlist"
+MAX_USERS = 10_000
+
+lookups = Counter("wishlist_membership_lookups_total", "Wishlist membership lookups by cache result.", ("result",))
+
+_members = OrderedDict()  # user id -> frozenset of product and pet ids
+# Bumped on every change so a load that raced a write is not cached.
+_epoch = 0
+
+async def members(user_id: str) -> frozenset:
+    cached = _members.get(user_id)
+    if cached is not None:
+        _members.move_to_end(user_id)
+        lookups.inc(("hit",))
+        return cached
+    lookups.inc(("miss",))
+    epoch = _epoch
+    rows = await prisma_client.query_raw(
+        'SELECT coalesce("productId", "petId") AS id FROM "Wishlist" WHERE "userId" = $1', user_id
+    )
+    ids = frozenset(row["id"] for row in rows if row["id"])
+    if epoch == _epoch:
+        _members[user_id] = ids
+        while len(_members) > MAX_USERS:
+            _members.popitem(last=False)
+    return ids
+
+def _changed(user_id: str, update):
+    global _epoch
+    _epoch += 1
+    cached = _members.get(user_id)
+    if cached is not None:
+        _members[user_id] = update(cached)
+
+async def added(user_id: str, item_ids):
+    """Record committed additions here and tell the other workers."""
+    _changed(user_id, lambda ids: ids | set(item_ids))
+    await _publish(user_id)
+
+async def removed(user_id: str, item_ids):
+    """Record committed removals here and tell the other workers."""
+    _changed(user_id, lambda ids: ids - set(item_ids))
+    await _publish(user_id)
+
+def drop(user_id: str):
+    global _epoch
+    _epoch += 1
+    _members.pop(user_id, None)
+
+async def _publish(user_id: str):
+    try:
+        message = json.dumps({"origin": invalidation.origin, "user": user_id})
+        await prisma_client.execute_raw("SELECT pg_notify($1, $2)", CHANNEL, message)
+    except Exception as e:
+        # The write itself succeeded; peers keep their copy until it is evicted.
+        print(f"Wishlist invalidation broadcast failed: {e}")
+
+def _on_notify(connection, pid, channel, payload):
+    try:
+        message = json.loads(payload)
+    except ValueError:
+        return
+    if message.get("origin") != invalidation.origin:
+        drop(message.get("user"))
+
+async def _resync():
+    global _epoch
+    _epoch += 1
+    _members.clear()
+
+invalidation.listen(CHANNEL, _on_notify, _resync)
+
+def metric_lines() -> list:
+    return lookups.render() + [
+        "# TYPE wishlist_membership_users gauge",
+        f"wishlist_membership_users {len(_members)}",
+    ]
@@ -0,0 +1,29 @@
+"""Rebuild the order and sales aggregates from the full order history.
+
+    python backfill_stats.py [--if-empty]
+
+Run once after deploying the aggregate tables, and after any bulk load that
+writes orders directly (benchmarks.dataset, catalog imports). Order writes
+wait while it runs; reads are unaffected.
+"""
+import argparse
+import asyncio
+from app.services import order_stats
+from app.services.prisma_client import prisma_client
+
+async def main(if_empty: bool):
+    await prisma_client.connect()
+    try:
+        if if_empty and await prisma_client.orderstatuscount.count():
+            print("Order stats already populated, skipping backfill")
+            return
+        counts = await order_stats.backfill()
+        print(f"Rebuilt stats for {counts['users']} users, {counts['product_days']} product-days, {counts['statuses']} statuses")
+    finally:
+        await prisma_client.disconnect()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--if-empty", action="store_true", help="only backfill when no aggregates exist yet")
+    args = parser.parse_args()
+    asyncio.run(main(args.if_empty))
@@ -0,0 +1,92 @@
+"""Check that concurrent checkouts of one cart place a single order.
+
+Run from back-end/ against a local Postgres (never production):
+    python -m benchmarks.checkout_race --concurrency 4 --rounds 10
+
+Starts uvicorn (or uses --url for a server that is already running), registers a
+scratch user and product, then each round fills the cart and posts --concurrency
+checkouts of it at once without an Idempotency-Key, like a double-clicked button.
+Exactly one checkout per round must succeed and the product's stock must drop by
+the cart quantity once; the script exits non-zero otherwise.
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+import httpx
+
+API = "/api/v1"
+QUANTITY = 2
+
+async def wait_until_ready(client: httpx.AsyncClient, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/health/ready")).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.5)
+    raise RuntimeError("server did not become ready")
+
+async def stock(client: httpx.AsyncClient, product_id: str) -> int:
+    response = await client.get(f"{API}/products/{product_id}")
+    response.raise_for_status()
+    return response.json()["stock"]
+
+async def check(args) -> int:
+    tag = f"bench-checkout-{os.getpid()}"
+    failures = 0
+    limits = httpx.Limits(max_connections=args.concurrency + 1)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=30) as client:
+        await wait_until_ready(client)
+        response = await client.post(f"{API}/users/register", params={"email": f"{tag}@example.com", "name": tag, "firebaseUid": tag})
+        response.raise_for_status()
+        user_id = response.json()["id"]
+        product = {"name": "Checkout race probe", "category": tag, "price": 1.0, "stock": args.rounds * QUANTITY * args.concurrency}
+        response = await client.post(f"{API}/products", json=product)
+        response.raise_for_status()
+        product_id = response.json()["id"]
+        order = {"shippingAddress": "1 Benchmark Street", "deliveryOption": "standard"}
+
+        for round_number in range(1, args.rounds + 1):
+            await client.delete(f"{API}/cart/{user_id}/clear")
+            items = [{"productId": product_id, "quantity": QUANTITY}]
+            (await client.post(f"{API}/cart/batch", json={"userId": user_id, "items": items})).raise_for_status()
+            before = await stock(client, product_id)
+            responses = await asyncio.gather(*(client.post(f"{API}/orders/{user_id}", json=order) for _ in range(args.concurrency)))
+            placed = sum(response.status_code == 200 for response in responses)
+            sold = before - await stock(client, product_id)
+            ok = placed == 1 and sold == QUANTITY
+            failures += not ok
+            statuses = ",".join(str(response.status_code) for response in responses)
+            print(f"round {round_number:>3}: {'ok  ' if ok else 'FAIL'} orders placed {placed}, stock sold {sold}, statuses {statuses}")
+    print(f"{failures} rounds failed")
+    return 1 if failures else 0
+
+def main(args) -> int:
+    server = None
+    if not args.url:
+        args.url = f"http://127.0.0.1:{args.port}"
+        env = {**os.environ, "RATE_LIMIT_ENABLED": "false"}
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port), "--workers", str(args.workers)],
+            env=env
+        )
+    try:
+        return asyncio.run(check(args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="use an already running server instead of starting one")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--port", type=int, default=8014)
+    parser.add_argument("--concurrency", type=int, default=4, help="checkouts of the same cart posted at once")
+    parser.add_argument("--rounds", type=int, default=10)
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,189 @@
+"""Load a deterministic synthetic catalog into the database for benchmarking.
+
+Run from back-end/ against a local Postgres (never production):
+    python -m benchmarks.dataset --pets 100000 --products 100000 --users 10000
+
+The same --seed always produces the same rows and ids, so baselines taken on
+different machines or branches compare like for like. Existing benchmark rows
+(ids starting with "bench-") are removed first. Orders are inserted directly, so
+run `python backfill_stats.py` afterwards to refresh the /stats aggregates.
+"""
+import argparse
+import asyncio
+import random
+from datetime import datetime, timedelta, timezone
+from prisma import Prisma
+
+ID_PREFIX = "bench-"
+CHUNK_SIZE = 5000
+BASE_TIME = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+SPECIES_BREEDS = {
+    "dogs": ["Golden Retriever", "Labrador", "Beagle", "Poodle", "Bulldog", "German Shepherd", "Husky", "Dachshund"],
+    "cats": ["Persian", "Siamese", "Maine Coon", "Bengal", "Ragdoll", "Sphynx"],
+    "birds": ["Parakeet", "Cockatiel", "Canary", "Lovebird"],
+    "fish": ["Goldfish", "Betta", "Guppy", "Angelfish"],
+    "rabbits": ["Holland Lop", "Netherland Dwarf", "Lionhead"],
+}
+PERSONALITIES = ["friendly", "energetic", "calm", "affectionate", "playful", "loyal", "curious", "gentle", "shy"]
+CATEGORIES = ["food", "toys", "habitats", "grooming", "health", "accessories", "training"]
+BRANDS = ["PetPro", "CatsLounge", "PlayPets", "HappyTails", "NaturePaws", "AquaLife", "FeatherCare", None]
+FILTERS = ["adult", "puppy", "senior", "organic", "durable", "comfortable", "grain-free", "small", "large"]
+ADJECTIVES = ["Premium", "Deluxe", "Classic", "Eco", "Ultra", "Cozy", "Sturdy", "Gentle"]
+NAMES = ["Max", "Bella", "Charlie", "Luna", "Cooper", "Daisy", "Milo", "Nala", "Rocky", "Coco", "Buddy", "Whiskers"]
+ORDER_STATUSES = ["pending", "confirmed", "shipped", "delivered", "cancelled"]
+
+def pet_id(i: int) -> str:
+    return f"{ID_PREFIX}pet-{i:07d}"
+
+def product_id(i: int) -> str:
+    return f"{ID_PREFIX}product-{i:07d}"
+
+def user_id(i: int) -> str:
+    return f"{ID_PREFIX}user-{i:06d}"
+
+def generate_pets(rng: random.Random, count: int):
+    for i in range(count):
+        species = rng.choice(list(SPECIES_BREEDS))
+        breed = rng.choice(SPECIES_BREEDS[species])
+        yield {
+            "id": pet_id(i),
+            "name": f"{rng.choice(NAMES)} {i}",
+            "species": species,
+            "breed": breed,
+            "age": rng.randint(0, 15),
+            "weight": round(rng.uniform(0.1, 45), 1),
+            "description": f"A {rng.choice(PERSONALITIES)} {breed.lower()} looking for a home",
+            "images": [f"https://example.com/pets/{i}.jpg"],
+            "videos": [],
+            "personality": rng.sample(PERSONALITIES, 2),
+            "breederName": f"Breeder {rng.randint(1, 500)}",
+            "breederRating": round(rng.uniform(3, 5), 1),
+            "price": round(rng.uniform(50, 3000), 2),
+            "available": rng.random() > 0.1,
+            "createdAt": BASE_TIME - timedelta(seconds=i * 37),
+        }
+
+def generate_products(rng: random.Random, count: int):
+    for i in range(count):
+        category = rng.choice(CATEGORIES)
+        yield {
+            "id": product_id(i),
+            "name": f"{rng.choice(ADJECTIVES)} {category.title()} {i}",
+            "description": f"{category.title()} for happy pets",
+            "category": category,
+            "petType": rng.choice(list(SPECIES_BREEDS)),
+            "brand": rng.choice(BRANDS),
+            "price": round(rng.uniform(2, 300), 2),
+            "images": [f"https://example.com/products/{i}.jpg"],
+            "stock": 1_000_000,
+            "filters": rng.sample(FILTERS, 2),
+            "createdAt": BASE_TIME - timedelta(seconds=i * 29),
+        }
+
+def generate_users(count: int):
+    for i in range(count):
+        yield {
+            "id": user_id(i),
+            "email": f"bench{i}@example.com",
+            "name": f"Bench User {i}",
+            "firebaseUid": f"{ID_PREFIX}uid-{i:06d}",
+        }
+
+def generate_user_activity(rng: random.Random, users: int, products: int, pets: int):
+    """Yield (cart_items, wishlist_items, orders, order_items) per user."""
+    for u in range(users):
+        uid = user_id(u)
+        cart_products = rng.sample(range(products), min(products, rng.randint(0, 5)))
+        cart = [
+            {"userId": uid, "productId": product_id(p), "quantity": rng.randint(1, 3), "price": 10.0}
+            for p in cart_products
+        ]
+        wishlist = [{"userId": uid, "productId": product_id(p)} for p in rng.sample(range(products), min(products, rng.randint(0, 8)))]
+        wishlist += [{"userId": uid, "petId": pet_id(p)} for p in rng.sample(range(pets), min(pets, rng.randint(0, 3)))]
+        orders, items = [], []
+        for o in range(rng.randint(0, 10)):
+            oid = f"{ID_PREFIX}order-{u:06d}-{o:02d}"
+            lines = [
+                {"orderId": oid, "productId": product_id(rng.randrange(products)), "quantity": rng.randint(1, 4), "price": round(rng.uniform(2, 300), 2)}
+                for _ in range(rng.randint(1, 6))
+            ]
+            orders.append({
+                "id": oid,
+                "userId": uid,
+                "status": rng.choice(ORDER_STATUSES),
+                "totalPrice": round(sum(line["price"] * line["quantity"] for line in lines), 2),
+                "shippingAddress": f"{u} Benchmark Street",
+                "deliveryOption": rng.choice(["standard", "express", "pickup"]),
+                "createdAt": BASE_TIME - timedelta(days=rng.randint(0, 720)),
+            })
+            items.extend(lines)
+        yield cart, wishlist, orders, items
+
+async def insert_chunked(table, rows):
+    chunk = []
+    total = 0
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= CHUNK_SIZE:
+            total += await table.create_many(data=chunk)
+            chunk = []
+    if chunk:
+        total += await table.create_many(data=chunk)
+    return total
+
+async def clear(db: Prisma):
+    # Cascades remove carts, wishlists, orders and order items of benchmark users.
+    await db.user.delete_many(where={"id": {"startswith": ID_PREFIX}})
+    await db.pet.delete_many(where={"id": {"startswith": ID_PREFIX}})
+    await db.product.delete_many(where={"id": {"startswith": ID_PREFIX}})
+
+async def load(pets: int, products: int, users: int, seed: int):
+    db = Prisma()
+    await db.connect()
+    try:
+        await clear(db)
+        print(f"pets:     {await insert_chunked(db.pet, generate_pets(random.Random(seed), pets))}")
+        print(f"products: {await insert_chunked(db.product, generate_products(random.Random(seed + 1), products))}")
+        print(f"users:    {await insert_chunked(db.user, generate_users(users))}")
+
+        rng = random.Random(seed + 2)
+        carts, wishlists, orders, items = [], [], [], []
+        counts = {"cart items": 0, "wishlist items": 0, "orders": 0, "order items": 0}
+        for cart, wishlist, user_orders, user_items in generate_user_activity(rng, users, products, pets):
+            carts += cart
+            wishlists += wishlist
+            orders += user_orders
+            items += user_items
+            if len(items) >= CHUNK_SIZE:
+                counts["cart items"] += await insert_chunked(db.cartitem, carts)
+                counts["wishlist items"] += await insert_chunked(db.wishlist, wishlists)
+                counts["orders"] += await insert_chunked(db.order, orders)
+                counts["order items"] += await insert_chunked(db.orderitem, items)
+                carts, wishlists, orders, items = [], [], [], []
+        counts["cart items"] += await insert_chunked(db.cartitem, carts)
+        counts["wishlist items"] += await insert_chunked(db.wishlist, wishlists)
+        counts["orders"] += await insert_chunked(db.order, orders)
+        counts["order items"] += await insert_chunked(db.orderitem, items)
+        for name, count in counts.items():
+            print(f"{name + ':':<16}{count}")
+    finally:
+        await db.disconnect()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pets", type=int, default=100_000)
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--clear", action="store_true", help="only remove benchmark rows")
+    args = parser.parse_args()
+    if args.clear:
+        async def _clear():
+            db = Prisma()
+            await db.connect()
+            await clear(db)
+            await db.disconnect()
+        asyncio.run(_clear())
+    else:
+        asyncio.run(load(args.pets, args.products, args.users, args.seed))
@@ -0,0 +1,159 @@
+"""Check the query plans behind the hot routes against the schema's indexes.
+
+Run from back-end/ against a local Postgres loaded by benchmarks.dataset (never
+production), with the schema pushed:
+    python -m benchmarks.explain [--only cart,orders] [--budget-scale 2]
+
+Starts one uvicorn worker with DB_LOG_QUERIES=true and captures the SQL and
+parameters Prisma's engine logs for each route in ROUTES. Every captured SELECT is
+re-run under EXPLAIN (ANALYZE, BUFFERS). The script exits non-zero when a route's
+plan contains a sequential scan or its queries touch more shared buffers than the
+route's budget. Plans need realistic table sizes: on a near-empty database the
+planner rightly prefers sequential scans.
+"""
+import argparse
+import asyncio
+import json
+import os
+import queue
+import re
+import subprocess
+import sys
+import threading
+import time
+import asyncpg
+import httpx
+from benchmarks.dataset import pet_id, product_id, user_id
+from app.config import get_settings
+from app.services.invalidation import listener_dsn
+
+API = "/api/v1"
+LOG_SETTLE_SECONDS = 0.3
+PLACEHOLDER = re.compile(r"\$(\d+)")
+
+# (name, path, params, shared buffer budget). Budgets cover every query the route
+# issues and leave headroom over the plans measured on the default dataset sizes.
+ROUTES = [
+    ("pets", "/pets", {"paginate": "cursor", "limit": 20}, 200),
+    ("pets-species", "/pets", {"species": "dogs", "paginate": "cursor", "limit": 20}, 200),
+    ("pets-offset", "/pets", {"species": "cats", "skip": 200, "limit": 20}, 2000),
+    ("products-category", "/products", {"category": "toys", "paginate": "cursor", "limit": 20}, 200),
+    ("products-pet-type", "/products", {"petType": "birds", "paginate": "cursor", "limit": 20}, 200),
+    ("pet", f"/pets/{pet_id(17)}", {}, 20),
+    ("product", f"/products/{product_id(17)}", {}, 20),
+    ("cart", f"/cart/{user_id(17)}", {"expand": "product,pet"}, 100),
+    ("wishlist", f"/wishlist/{user_id(17)}", {"expand": "product,pet"}, 100),
+    ("orders", f"/orders/user/{user_id(17)}", {"expand": "items"}, 300),
+    ("orders-status", f"/orders/user/{user_id(17)}", {"status": "delivered"}, 100),
+    ("stats-user", f"/stats/users/{user_id(17)}", {}, 20),
+    ("stats-product-daily", f"/stats/products/{product_id(17)}/daily", {}, 50),
+]
+
+def read_queries(stream, sink: queue.Queue):
+    # The engine logs one JSON object per line; anything else on stdout is ignored.
+    for line in stream:
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            continue
+        fields = entry.get("fields", {}) if isinstance(entry, dict) else {}
+        if not fields.get("is_query") and fields.get("item_type") != "query":
+            continue
+        sql = fields.get("query") or fields.get("message") or ""
+        params = fields.get("params") or "[]"
+        sink.put((sql, json.loads(params) if isinstance(params, str) else params))
+
+def drain(sink: queue.Queue) -> list:
+    captured = []
+    while True:
+        try:
+            captured.append(sink.get_nowait())
+        except queue.Empty:
+            return captured
+
+def literal(value) -> str:
+    if value is None:
+        return "NULL"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return repr(value)
+    if not isinstance(value, str):
+        value = json.dumps(value)
+    return "'" + value.replace("'", "''") + "'"
+
+def inline(sql: str, params: list) -> str:
+    # Untyped literals take their type from context, as the bound parameters did.
+    return PLACEHOLDER.sub(lambda match: literal(params[int(match.group(1)) - 1]), sql)
+
+def seq_scans(node: dict) -> list:
+    found = [node["Relation Name"]] if node.get("Node Type") == "Seq Scan" else []
+    for child in node.get("Plans", []):
+        found += seq_scans(child)
+    return found
+
+async def explain(connection, sql: str, params: list) -> dict:
+    rows = await connection.fetchval("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + inline(sql, params))
+    return (json.loads(rows) if isinstance(rows, str) else rows)[0]["Plan"]
+
+async def check(args, sink: queue.Queue) -> int:
+    failures = 0
+    routes = [route for route in ROUTES if not args.only or route[0] in args.only.split(",")]
+    connection = await asyncpg.connect(listener_dsn(get_settings().DATABASE_URL))
+    try:
+        async with httpx.AsyncClient(base_url=args.url, timeout=30) as client:
+            deadline = time.monotonic() + 120
+            while (await client.get("/health/ready")).status_code != 200:
+                if time.monotonic() > deadline:
+                    raise RuntimeError("server did not become ready")
+                await asyncio.sleep(0.5)
+            await asyncio.sleep(LOG_SETTLE_SECONDS)
+            drain(sink)
+
+            for name, path, params, budget in routes:
+                response = await client.get(API + path, params=params)
+                await asyncio.sleep(LOG_SETTLE_SECONDS)
+                queries = [(sql, values) for sql, values in drain(sink) if sql.lstrip().upper().startswith("SELECT")]
+                problems, buffers = [], 0
+                if response.status_code != 200:
+                    problems.append(f"HTTP {response.status_code}")
+                for sql, values in queries:
+                    plan = await explain(connection, sql, values)
+                    buffers += plan.get("Shared Hit Blocks", 0) + plan.get("Shared Read Blocks", 0)
+                    for relation in seq_scans(plan):
+                        problems.append(f"seq scan on {relation}")
+                        if args.verbose:
+                            print(f"    {inline(sql, values)}")
+                limit = int(budget * args.budget_scale)
+                if buffers > limit:
+                    problems.append(f"{buffers} buffers over budget {limit}")
+                failures += bool(problems)
+                status = "ok" if not problems else "FAIL " + "; ".join(problems)
+                print(f"{name:<22}{len(queries):>3} queries {buffers:>7} buffers  {status}")
+    finally:
+        await connection.close()
+    print(f"{failures} of {len(routes)} routes failed")
+    return 1 if failures else 0
+
+def main(args) -> int:
+    args.url = f"http://127.0.0.1:{args.port}"
+    env = {**os.environ, "DB_LOG_QUERIES": "true", "RATE_LIMIT_ENABLED": "false", "WEB_WORKERS": "1"}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port), "--no-access-log"],
+        env=env, stdout=subprocess.PIPE, text=True
+    )
+    sink = queue.Queue()
+    threading.Thread(target=read_queries, args=(server.stdout, sink), daemon=True).start()
+    try:
+        return asyncio.run(check(args, sink))
+    finally:
+        server.terminate()
+        server.wait()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument("--only", help="comma-separated route names to check")
+    parser.add_argument("--budget-scale", type=float, default=1.0, help="multiply every buffer budget")
+    parser.add_argument("--verbose", action="store_true", help="print the SQL behind each seq scan")
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,60 @@
+"""Fail when importing the app gets slower than a budget or pulls in lazy-only modules.
+
+Run from back-end/:
+    python -m benchmarks.import_time --budget 1.5
+
+Imports app.main in a fresh interpreter under -X importtime and reports the total
+plus the slowest top-level packages. Modules in LAZY_MODULES must only be imported
+when first used (the Firebase/Google auth stack, Pillow, asyncpg, numpy), so seeing
+any of them at import time is a failure regardless of the budget.
+"""
+import argparse
+import subprocess
+import sys
+from collections import defaultdict
+
+LAZY_MODULES = ("firebase_admin", "google.auth", "google.cloud", "grpc", "PIL", "asyncpg", "numpy")
+
+def measure(target: str) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    # Lines look like: "import time:  self [us] | cumulative | imported package"
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        parts = line[len("import time:"):].split("|")
+        if not line.startswith("import time:") or len(parts) != 3 or "cumulative" in line:
+            continue
+        cumulative[parts[2].strip()] = int(parts[1])
+    return cumulative
+
+def main(args) -> int:
+    # The first run warms the bytecode cache so the numbers reflect a normal restart.
+    measure(args.target)
+    runs = [measure(args.target) for _ in range(args.runs)]
+    timings = min(runs, key=lambda run: run.get(args.target, 0))
+    total = timings.get(args.target, 0) / 1_000_000
+
+    packages = defaultdict(int)
+    for name, micros in timings.items():
+        if "." not in name:
+            packages[name] = max(packages[name], micros)
+    print(f"import {args.target}: {total:.3f}s (budget {args.budget:.3f}s)")
+    for name, micros in sorted(packages.items(), key=lambda kv: -kv[1])[:args.top]:
+        print(f"  {micros / 1000:>8.1f} ms  {name}")
+
+    eager = sorted({lazy for lazy in LAZY_MODULES for name in timings if name == lazy or name.startswith(lazy + ".")})
+    if eager:
+        print(f"imported eagerly but should be lazy: {', '.join(eager)}")
+    return 1 if eager or total > args.budget else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", default="app.main")
+    parser.add_argument("--budget", type=float, default=1.5, help="seconds")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15)
+    sys.exit(main(parser.parse_args()))
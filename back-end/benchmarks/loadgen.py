@@ -0,0 +1,180 @@
+"""Drive the main user journeys against a running API and record latency baselines.
+
+Run from back-end/ after loading benchmarks.dataset with the same sizes:
+    python -m benchmarks.loadgen run --url http://localhost:8000 --duration 60 --out benchmarks/baselines/main.json
+    python -m benchmarks.loadgen compare benchmarks/baselines/main.json benchmarks/baselines/branch.json
+
+Every simulated user shares one address, so start the server under test with
+RATE_LIMIT_ENABLED=false or the per-client limits will dominate the numbers.
+
+`compare` exits non-zero when any endpoint's p95 or p99 regresses by more than
+--threshold (default 10%) or its throughput drops by more than that.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+import httpx
+from benchmarks.dataset import SPECIES_BREEDS, CATEGORIES, pet_id, product_id, user_id
+
+API = "/api/v1"
+CHECKOUT_CART_SIZES = (1, 5, 20, 50)
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    async def call(self, client: httpx.AsyncClient, label: str, method: str, path: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, API + path, **kwargs)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            response, ok = None, False
+        self.latencies[label].append(time.perf_counter() - started)
+        if not ok:
+            self.errors[label] += 1
+        return response
+
+def percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+async def browse(rec: Recorder, client, rng: random.Random, sizes):
+    response = await rec.call(client, "GET /pets", "GET", "/pets", params={"paginate": "cursor", "limit": 20})
+    cursor = response.json().get("next_cursor") if response is not None and response.status_code == 200 else None
+    for _ in range(3):
+        if not cursor:
+            break
+        response = await rec.call(client, "GET /pets?cursor", "GET", "/pets", params={"cursor": cursor, "limit": 20})
+        cursor = response.json().get("next_cursor") if response is not None and response.status_code == 200 else None
+    await rec.call(client, "GET /pets?species", "GET", "/pets", params={"species": rng.choice(list(SPECIES_BREEDS)), "paginate": "cursor"})
+    await rec.call(client, "GET /products", "GET", "/products", params={"category": rng.choice(CATEGORIES), "paginate": "cursor"})
+    await rec.call(client, "GET /products?skip", "GET", "/products", params={"skip": rng.randrange(0, max(1, sizes["products"] - 20)), "limit": 20})
+
+async def facets(rec: Recorder, client, rng: random.Random, sizes):
+    await rec.call(client, "GET /pets/species/list", "GET", "/pets/species/list")
+    await rec.call(client, "GET /pets/breeds/{species}", "GET", f"/pets/breeds/{rng.choice(list(SPECIES_BREEDS))}")
+    await rec.call(client, "GET /products/categories/list", "GET", "/products/categories/list")
+    await rec.call(client, "GET /products/brands/list", "GET", "/products/brands/list")
+
+async def detail(rec: Recorder, client, rng: random.Random, sizes):
+    await rec.call(client, "GET /pets/{id}", "GET", f"/pets/{pet_id(rng.randrange(sizes['pets']))}")
+    await rec.call(client, "GET /products/{id}", "GET", f"/products/{product_id(rng.randrange(sizes['products']))}")
+
+async def add_to_cart(rec: Recorder, client, rng: random.Random, sizes):
+    uid = user_id(rng.randrange(sizes["users"]))
+    items = [{"productId": product_id(rng.randrange(sizes["products"])), "quantity": 1} for _ in range(3)]
+    await rec.call(client, "POST /cart/batch", "POST", "/cart/batch", json={"userId": uid, "items": items})
+    await rec.call(client, "GET /cart/{user}", "GET", f"/cart/{uid}", params={"expand": "product,pet"})
+
+async def checkout(rec: Recorder, client, rng: random.Random, sizes):
+    # Checkout latency should stay flat as the cart grows; each size is reported separately.
+    cart_size = rng.choice(CHECKOUT_CART_SIZES)
+    uid = user_id(rng.randrange(sizes["users"]))
+    await rec.call(client, "DELETE /cart/{user}/clear", "DELETE", f"/cart/{uid}/clear")
+    products = rng.sample(range(sizes["products"]), min(cart_size, sizes["products"]))
+    items = [{"productId": product_id(p), "quantity": 1} for p in products]
+    await rec.call(client, "POST /cart/batch", "POST", "/cart/batch", json={"userId": uid, "items": items})
+    order = {"shippingAddress": "1 Benchmark Street", "deliveryOption": "standard"}
+    await rec.call(client, f"POST /orders/{{user}} cart={cart_size}", "POST", f"/orders/{uid}", json=order)
+
+JOURNEYS = {"browse": (browse, 50), "facets": (facets, 15), "detail": (detail, 20), "add_to_cart": (add_to_cart, 10), "checkout": (checkout, 5)}
+
+async def worker(rec: Recorder, client, rng: random.Random, deadline: float, sizes, journeys):
+    names = list(journeys)
+    weights = [JOURNEYS[name][1] for name in names]
+    while time.perf_counter() < deadline:
+        journey = JOURNEYS[rng.choices(names, weights)[0]][0]
+        await journey(rec, client, rng, sizes)
+
+async def run(args):
+    sizes = {"pets": args.pets, "products": args.products, "users": args.users}
+    journeys = args.journeys.split(",") if args.journeys else list(JOURNEYS)
+    rec = Recorder()
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=30) as client:
+        deadline = time.perf_counter() + args.warmup
+        await asyncio.gather(*(worker(Recorder(), client, random.Random(args.seed + 1000 + i), deadline, sizes, journeys) for i in range(args.concurrency)))
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*(worker(rec, client, random.Random(args.seed + i), deadline, sizes, journeys) for i in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    report = {
+        "meta": {"url": args.url, "duration": round(elapsed, 2), "concurrency": args.concurrency, "seed": args.seed, "sizes": sizes, "journeys": journeys},
+        "endpoints": {},
+    }
+    for label in sorted(rec.latencies):
+        values = rec.latencies[label]
+        report["endpoints"][label] = {
+            "requests": len(values),
+            "errors": rec.errors[label],
+            "throughput_rps": round(len(values) / elapsed, 2),
+            "p50_ms": round(percentile(values, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(values, 0.95) * 1000, 2),
+            "p99_ms": round(percentile(values, 0.99) * 1000, 2),
+        }
+    text = json.dumps(report, indent=2)
+    if args.out:
+        os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    print(text)
+
+def compare(args) -> int:
+    with open(args.baseline) as f:
+        baseline = json.load(f)["endpoints"]
+    with open(args.current) as f:
+        current = json.load(f)["endpoints"]
+
+    regressions = 0
+    print(f"{'endpoint':<40}{'metric':<16}{'baseline':>10}{'current':>10}{'change':>9}")
+    for label, base in baseline.items():
+        now = current.get(label)
+        if now is None:
+            print(f"{label:<40}{'missing':<16}")
+            regressions += 1
+            continue
+        for metric, worse_when_higher in (("p95_ms", True), ("p99_ms", True), ("throughput_rps", False)):
+            if not base[metric]:
+                continue
+            change = now[metric] / base[metric] - 1
+            regressed = change > args.threshold if worse_when_higher else change < -args.threshold
+            flag = "  REGRESSION" if regressed else ""
+            regressions += regressed
+            print(f"{label:<40}{metric:<16}{base[metric]:>10}{now[metric]:>10}{change * 100:>8.1f}%{flag}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run")
+    run_parser.add_argument("--url", default="http://localhost:8000")
+    run_parser.add_argument("--duration", type=float, default=60)
+    run_parser.add_argument("--warmup", type=float, default=10)
+    run_parser.add_argument("--concurrency", type=int, default=32)
+    run_parser.add_argument("--journeys", help=f"comma separated subset of: {', '.join(JOURNEYS)}")
+    run_parser.add_argument("--pets", type=int, default=100_000)
+    run_parser.add_argument("--products", type=int, default=100_000)
+    run_parser.add_argument("--users", type=int, default=10_000)
+    run_parser.add_argument("--seed", type=int, default=42)
+    run_parser.add_argument("--out")
+
+    compare_parser = commands.add_parser("compare")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.10)
+
+    args = parser.parse_args()
+    if args.command == "run":
+        asyncio.run(run(args))
+    else:
+        sys.exit(compare(args))
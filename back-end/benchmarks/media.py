@@ -0,0 +1,113 @@
+"""Compare media serving by the /uploads StaticFiles mount and the /api/v1/uploads route.
+
+Run from back-end/ against a local Postgres (never production):
+    python -m benchmarks.media --size-mb 64 --concurrency 8 --requests 64
+
+Starts uvicorn (or uses --url for a server that is already running and shares this
+uploads/ directory), writes a scratch file of --size-mb random bytes into uploads/,
+then times whole-file downloads and random 1 MB range reads through both paths and
+prints requests/s and MB/s. The mount ignores Range and returns the whole file, which
+the status column makes visible.
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import random
+import subprocess
+import sys
+import time
+import httpx
+
+UPLOAD_DIR = "uploads"
+RANGE_BYTES = 1024 * 1024
+
+async def wait_until_ready(client: httpx.AsyncClient, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/health/ready")).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.5)
+    raise RuntimeError("server did not become ready")
+
+def write_scratch_file(size: int) -> str:
+    data = os.urandom(size)
+    path = os.path.join(UPLOAD_DIR, f"{hashlib.sha256(data).hexdigest()}.mp4")
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+async def measure(client: httpx.AsyncClient, path: str, size: int, args, ranged: bool) -> dict:
+    rng = random.Random(args.seed)
+    pending = args.requests
+    received = 0
+    statuses = set()
+
+    async def worker():
+        nonlocal pending, received
+        while pending > 0:
+            pending -= 1
+            headers = {}
+            if ranged:
+                start = rng.randrange(0, max(1, size - RANGE_BYTES))
+                headers["Range"] = f"bytes={start}-{start + RANGE_BYTES - 1}"
+            async with client.stream("GET", path, headers=headers) as response:
+                statuses.add(response.status_code)
+                async for chunk in response.aiter_raw():
+                    received += len(chunk)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "rps": args.requests / elapsed,
+        "mb_s": received / elapsed / 1024 / 1024,
+        "status": ",".join(str(status) for status in sorted(statuses)),
+    }
+
+async def run(args) -> int:
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    size = args.size_mb * 1024 * 1024
+    path = write_scratch_file(size)
+    name = os.path.basename(path)
+    try:
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=120) as client:
+            await wait_until_ready(client)
+            print(f"{'path':<26}{'mode':<8}{'status':<9}{'req/s':>9}{'MB/s':>10}")
+            for label, url in (("StaticFiles /uploads", f"/uploads/{name}"), ("route /api/v1/uploads", f"/api/v1/uploads/{name}")):
+                for mode in ("full", "range"):
+                    result = await measure(client, url, size, args, ranged=mode == "range")
+                    print(f"{label:<26}{mode:<8}{result['status']:<9}{result['rps']:>9.1f}{result['mb_s']:>10.1f}")
+    finally:
+        os.remove(path)
+    return 0
+
+def main(args) -> int:
+    server = None
+    if not args.url:
+        args.url = f"http://127.0.0.1:{args.port}"
+        env = {**os.environ, "RATE_LIMIT_ENABLED": "false"}
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port), "--no-access-log"],
+            env=env
+        )
+    try:
+        return asyncio.run(run(args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="use an already running server instead of starting one")
+    parser.add_argument("--port", type=int, default=8013)
+    parser.add_argument("--size-mb", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=64, help="requests per path and mode")
+    parser.add_argument("--seed", type=int, default=42)
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,52 @@
+"""Measure the per-request cost of MetricsMiddleware against a bare app.
+
+Run from back-end/:  python -m benchmarks.metrics_overhead [--requests 2000] [--rounds 8]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import httpx
+from fastapi import FastAPI
+from app.services import metrics
+from app.services.serialization import FastJSONResponse
+
+PAGE = [{"id": f"pet{i}", "name": f"Pet {i}", "price": 100.0 + i, "images": ["a.jpg"]} for i in range(20)]
+
+def build_app(instrumented: bool) -> FastAPI:
+    app = FastAPI(default_response_class=FastJSONResponse)
+    if instrumented:
+        app.add_middleware(metrics.MetricsMiddleware)
+
+    @app.get("/pets/{pet_id}")
+    async def page(pet_id: str):
+        return {"data": PAGE, "total": len(PAGE)}
+
+    return app
+
+async def drive(app: FastAPI, requests: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for i in range(200):
+            await client.get(f"/pets/{i}")
+        started = time.perf_counter()
+        for i in range(requests):
+            await client.get(f"/pets/{i}")
+        return (time.perf_counter() - started) / requests
+
+async def main(requests: int, rounds: int):
+    bare, timed = [], []
+    for _ in range(rounds):
+        bare.append(await drive(build_app(False), requests))
+        timed.append(await drive(build_app(True), requests))
+    bare_us, timed_us = statistics.median(bare) * 1e6, statistics.median(timed) * 1e6
+    print(f"bare:         {bare_us:8.1f} us/request")
+    print(f"instrumented: {timed_us:8.1f} us/request")
+    print(f"overhead:     {timed_us - bare_us:8.1f} us ({(timed_us / bare_us - 1) * 100:.1f}%)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=8)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.rounds))
@@ -0,0 +1,116 @@
+"""Check read-replica routing against two local Postgres databases.
+
+Run from back-end/ with DATABASE_URL pointing at the primary and the schema pushed
+to both databases (never production):
+    python -m benchmarks.replica_routing --read-url postgresql://localhost:5433/petbloom
+
+The second database does not need to replicate from the first; writes reaching
+only the primary are what make the routing visible. The script starts a server with
+DATABASE_READ_URL=--read-url and checks that:
+  - a product is readable right after it is written (reads stick to the primary),
+  - once the sticky window passes, catalog reads come from the read database,
+  - with the read database unreachable, every read falls back to the primary.
+It exits non-zero on the first check that fails.
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+import httpx
+
+API = "/api/v1"
+UNREACHABLE_URL = "postgresql://petbloom@127.0.0.1:1/petbloom"
+
+class CheckFailed(Exception):
+    pass
+
+def expect(condition: bool, message: str):
+    print(f"{'ok  ' if condition else 'FAIL'} {message}")
+    if not condition:
+        raise CheckFailed(message)
+
+def start_server(port: int, read_url: str, sticky: float):
+    # The read database is not a standby, so its lag is always 0; a zero lag limit keeps
+    # the sticky window at --sticky rather than the server's lag-based floor.
+    env = {
+        **os.environ, "DATABASE_READ_URL": read_url, "REPLICA_STICKY_SECONDS": str(sticky),
+        "REPLICA_MAX_LAG_SECONDS": "0", "RATE_LIMIT_ENABLED": "false", "WEB_WORKERS": "1",
+    }
+    return subprocess.Popen([sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port)], env=env)
+
+async def metric(client: httpx.AsyncClient, prefix: str) -> float:
+    for line in (await client.get("/metrics")).text.splitlines():
+        if line.startswith(prefix + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+async def wait_for(client: httpx.AsyncClient, prefix: str, value: float, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/health/ready")).status_code == 200 and await metric(client, prefix) == value:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.5)
+    raise CheckFailed(f"{prefix} never reached {value}")
+
+async def listing(client: httpx.AsyncClient, category: str, probe: int) -> list:
+    # A fresh query string each time so the listing cache never answers.
+    response = await client.get(f"{API}/products", params={"category": category, "limit": probe})
+    response.raise_for_status()
+    return response.json()["data"]
+
+async def check_routing(url: str, sticky: float):
+    category = f"bench-replica-{os.getpid()}"
+    async with httpx.AsyncClient(base_url=url, timeout=10) as client:
+        await wait_for(client, "db_replica_healthy", 1)
+        response = await client.post(f"{API}/products", json={"name": "Replica probe", "category": category, "price": 1.0, "stock": 1})
+        response.raise_for_status()
+        product_id = response.json()["id"]
+        try:
+            expect((await client.get(f"{API}/products/{product_id}")).status_code == 200, "new product readable straight after the write")
+            expect(len(await listing(client, category, 1)) == 1, "new product listed straight after the write")
+
+            await asyncio.sleep(sticky + 1)
+            replica_reads = await metric(client, 'db_catalog_reads_total{target="replica"}')
+            expect(len(await listing(client, category, 2)) == 0, "listing served by the read database after the sticky window")
+            expect(await metric(client, 'db_catalog_reads_total{target="replica"}') > replica_reads, "replica read counter advanced")
+        finally:
+            await client.delete(f"{API}/products/{product_id}")
+
+async def check_fallback(url: str):
+    async with httpx.AsyncClient(base_url=url, timeout=10) as client:
+        await wait_for(client, "db_replica_healthy", 0)
+        await asyncio.sleep(1)
+        primary_reads = await metric(client, 'db_catalog_reads_total{target="primary"}')
+        response = await client.get(f"{API}/products", params={"limit": 3})
+        expect(response.status_code == 200, "listing succeeds with the read database down")
+        expect(await metric(client, 'db_catalog_reads_total{target="primary"}') > primary_reads, "read served by the primary")
+
+def run(port: int, read_url: str, sticky: float, check, *check_args) -> None:
+    server = start_server(port, read_url, sticky)
+    try:
+        asyncio.run(check(*check_args))
+    finally:
+        server.terminate()
+        server.wait()
+
+def main(args) -> int:
+    try:
+        url = f"http://127.0.0.1:{args.port}"
+        run(args.port, args.read_url, args.sticky, check_routing, url, args.sticky)
+        run(args.port, UNREACHABLE_URL, args.sticky, check_fallback, url)
+    except CheckFailed:
+        return 1
+    print("replica routing ok")
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--read-url", required=True, help="second database standing in for the replica")
+    parser.add_argument("--port", type=int, default=8012)
+    parser.add_argument("--sticky", type=float, default=4.0, help="REPLICA_STICKY_SECONDS for the server under test (at least 4)")
+    sys.exit(main(parser.parse_args()))
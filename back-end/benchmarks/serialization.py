@@ -0,0 +1,59 @@
+"""Serialization cost per 100-item listing page, before and after the fast path.
+
+Run from back-end/:  python -m benchmarks.serialization [--iterations 2000]
+
+Rows are PetResponse instances standing in for Prisma Pet models (both are
+pydantic models with the same scalar fields).
+"""
+import argparse
+import time
+from datetime import datetime, timezone
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from app.schemas import PetPage, PetResponse
+from app.services.serialization import encode, listing_payload, PET_FIELDS
+
+def make_rows(count: int) -> list:
+    now = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    return [
+        PetResponse(
+            id=f"pet{i:05d}", name=f"Pet {i}", species="dogs", breed="Labrador", age=i % 15,
+            weight=12.5, description="Friendly and energetic " * 4, images=[f"https://example.com/{i}.jpg"],
+            personality=["friendly", "loyal"], breederName="Happy Paws", price=500.0 + i,
+            createdAt=now, updatedAt=now,
+        )
+        for i in range(count)
+    ]
+
+def untyped_dict(rows):
+    # Old get_pets: untyped dict through jsonable_encoder and the stdlib encoder.
+    return JSONResponse(jsonable_encoder({"data": rows, "total": len(rows)})).body
+
+def response_model(rows):
+    # What FastAPI does for a route declared with response_model=PetPage.
+    page = PetPage.model_validate({"data": rows, "total": len(rows)}, from_attributes=True)
+    return JSONResponse(jsonable_encoder(page.model_dump(mode="json"))).body
+
+def fast_path(rows):
+    return encode(listing_payload({"data": rows, "total": len(rows)}, PET_FIELDS))
+
+def measure(fn, rows, iterations: int) -> float:
+    for _ in range(50):
+        fn(rows)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn(rows)
+    return (time.perf_counter() - started) / iterations
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--page-size", type=int, default=100)
+    args = parser.parse_args()
+
+    rows = make_rows(args.page_size)
+    baseline = None
+    for name, fn in (("untyped dict + json", untyped_dict), ("response_model + json", response_model), ("projection + orjson", fast_path)):
+        cost = measure(fn, rows, args.iterations)
+        baseline = baseline or cost
+        print(f"{name:<24}{cost * 1e6:9.1f} us/page  ({baseline / cost:4.1f}x)")
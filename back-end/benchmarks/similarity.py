@@ -0,0 +1,45 @@
+"""Top-k similarity lookup latency over a synthetic catalog.
+
+Run from back-end/:  python -m benchmarks.similarity [--items 100000] [--queries 2000]
+
+Builds the pet similarity index from benchmarks.dataset rows in a temporary
+directory (no database needed) and times SimilarityIndex.similar for random query
+pets, the same call GET /pets/{id}/similar makes.
+"""
+import argparse
+import random
+import tempfile
+import time
+from types import SimpleNamespace
+from benchmarks.dataset import generate_pets
+from app.services.similarity import SimilarityIndex, pet_vector
+
+def main(args):
+    rows = [SimpleNamespace(**pet) for pet in generate_pets(random.Random(args.seed), args.items)]
+    with tempfile.TemporaryDirectory() as directory:
+        index = SimilarityIndex("pet", pet_vector, "species", directory)
+        started = time.perf_counter()
+        index.write_all(index.encode_all(rows))
+        buckets = len(index.buckets)
+        print(f"build:  {len(rows)} vectors in {buckets} buckets in {time.perf_counter() - started:.2f}s")
+
+        rng = random.Random(args.seed + 1)
+        queries = [rng.choice(rows) for _ in range(args.queries)]
+        index.similar(queries[0], args.k)
+        timings = []
+        for row in queries:
+            started = time.perf_counter()
+            index.similar(row, args.k)
+            timings.append(time.perf_counter() - started)
+        timings.sort()
+        p50 = timings[len(timings) // 2] * 1e6
+        p99 = timings[int(len(timings) * 0.99)] * 1e6
+        print(f"top-{args.k}: p50 {p50:.0f} us, p99 {p99:.0f} us over {args.queries} queries")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    main(parser.parse_args())
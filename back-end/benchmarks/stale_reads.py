@@ -0,0 +1,154 @@
+"""Check that writes on one worker are never served stale by another.
+
+Run from back-end/ against a local Postgres (never production):
+    python -m benchmarks.stale_reads --workers 4
+
+Starts uvicorn with --workers (or uses --url for a server that is already running),
+creates a scratch product, then repeatedly warms every worker's caches, updates the
+product through one connection and reads it back over fresh connections, which the
+kernel spreads across the workers. With --writers, that many other scratch products
+are updated at the same moment over their own connections, so several workers write
+at once. Detail, listing and brand-facet reads taken more than --grace seconds after
+a write must all show the new state, and no listing ETag seen before the write may
+still be answered with 304; the script exits non-zero if any do.
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+import httpx
+
+API = "/api/v1"
+
+async def wait_until_healthy(client: httpx.AsyncClient, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/health/ready")).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.5)
+    raise RuntimeError("server did not become healthy")
+
+async def read_state(client: httpx.AsyncClient, product_id: str, category: str) -> dict:
+    detail = await client.get(f"{API}/products/{product_id}")
+    listing = await client.get(f"{API}/products", params={"category": category})
+    brands = await client.get(f"{API}/products/brands/list")
+    rows = listing.json()["data"] if listing.status_code == 200 else []
+    return {
+        "detail": detail.json() if detail.status_code == 200 else None,
+        "listing": rows[0] if rows else None,
+        "brands": brands.json() if brands.status_code == 200 else [],
+        "etag": listing.headers.get("etag"),
+    }
+
+def stale_fields(state: dict, expected) -> list:
+    if expected is None:
+        return [name for name in ("detail", "listing") if state[name] is not None]
+    stale = [name for name in ("detail", "listing") if state[name] is None or state[name]["price"] != expected["price"]]
+    if expected["brand"] not in state["brands"]:
+        stale.append("brands")
+    return stale
+
+def fresh_connections(url: str) -> httpx.AsyncClient:
+    # No keep-alive, so every request opens a new connection and may land on any worker.
+    return httpx.AsyncClient(base_url=url, limits=httpx.Limits(max_keepalive_connections=0), timeout=10)
+
+async def sample(url: str, reads: int, product_id: str, category: str, expected, etags: set = None) -> dict:
+    async with fresh_connections(url) as client:
+        states = await asyncio.gather(*(read_state(client, product_id, category) for _ in range(reads)))
+    stale = {}
+    for state in states:
+        for name in stale_fields(state, expected):
+            stale[name] = stale.get(name, 0) + 1
+        if etags is not None and state["etag"]:
+            etags.add(state["etag"])
+    return stale
+
+async def revalidated(url: str, category: str, etags: set, reads: int) -> int:
+    """Count conditional listing reads still answered 304 for ETags minted before a write."""
+    async with fresh_connections(url) as client:
+        responses = await asyncio.gather(*(
+            client.get(f"{API}/products", params={"category": category}, headers={"If-None-Match": etag})
+            for etag in etags for _ in range(max(1, reads // len(etags)))
+        ))
+    return sum(response.status_code == 304 for response in responses)
+
+async def create(client: httpx.AsyncClient, product: dict) -> str:
+    response = await client.post(f"{API}/products", json=product)
+    response.raise_for_status()
+    return response.json()["id"]
+
+async def check(args) -> int:
+    category = f"bench-stale-{os.getpid()}"
+    failures = 0
+    async with httpx.AsyncClient(base_url=args.url, timeout=10) as client:
+        await wait_until_healthy(client)
+        product = {"name": "Stale read probe", "category": category, "brand": f"{category}-0", "price": 1.0, "stock": 1}
+        product_id = await create(client, product)
+        others = {}
+        for writer in range(args.writers):
+            other = {**product, "name": "Concurrent writer", "category": f"{category}-w{writer}"}
+            others[await create(client, other)] = other
+        try:
+            async with fresh_connections(args.url) as writers:
+                for round_number in range(1, args.rounds + 1):
+                    etags = set()
+                    await sample(args.url, args.reads, product_id, category, product, etags)
+                    product = {**product, "price": float(round_number + 1), "brand": f"{category}-{round_number}"}
+                    responses = await asyncio.gather(
+                        client.put(f"{API}/products/{product_id}", json=product),
+                        *(writers.put(f"{API}/products/{other_id}", json={**other, "price": float(round_number + 1)})
+                          for other_id, other in others.items())
+                    )
+                    for response in responses:
+                        response.raise_for_status()
+                    await asyncio.sleep(args.grace)
+                    stale = await sample(args.url, args.reads, product_id, category, product)
+                    not_modified = await revalidated(args.url, category, etags, args.reads)
+                    if not_modified:
+                        stale["etag"] = not_modified
+                    failures += sum(stale.values())
+                    print(f"round {round_number:>3}: {'ok' if not stale else f'STALE {stale}'}")
+        finally:
+            await sample(args.url, args.reads, product_id, category, product)
+            for other_id in others:
+                await client.delete(f"{API}/products/{other_id}")
+            await client.delete(f"{API}/products/{product_id}")
+        await asyncio.sleep(args.grace)
+        stale = await sample(args.url, args.reads, product_id, category, None)
+        failures += sum(stale.values())
+        print(f"deleted:   {'ok' if not stale else f'STALE {stale}'}")
+    print(f"{failures} stale reads")
+    return 1 if failures else 0
+
+def main(args) -> int:
+    server = None
+    if not args.url:
+        args.url = f"http://127.0.0.1:{args.port}"
+        # Warm-up bursts all come from one address and would trip the browse rate limit.
+        env = {**os.environ, "WEB_WORKERS": str(args.workers), "RATE_LIMIT_ENABLED": "false"}
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port), "--workers", str(args.workers)],
+            env=env
+        )
+    try:
+        return asyncio.run(check(args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="use an already running server instead of starting one")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8010)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--reads", type=int, default=40, help="reads per sample, spread over fresh connections")
+    parser.add_argument("--writers", type=int, default=3, help="other products written at the same moment as the probe")
+    parser.add_argument("--grace", type=float, default=2.0, help="seconds a write may take to reach every worker")
+    sys.exit(main(parser.parse_args()))
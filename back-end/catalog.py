@@ -0,0 +1,74 @@
+"""Bulk catalog import and export.
+
+    python catalog.py import pets pets.csv [--checkpoint pets.ckpt]
+    python catalog.py import products products.jsonl
+    python catalog.py export orders --format csv > orders.csv
+
+Imports validate each row against PetCreate/ProductCreate and insert in
+create_many batches. With --checkpoint the last committed line is recorded
+after every batch and a rerun resumes after it. CSV list columns (images,
+personality, filters, videos) are separated with "|".
+"""
+import argparse
+import asyncio
+import os
+import sys
+from app.services import catalog_io
+from app.services.prisma_client import prisma_client
+
+def read_checkpoint(path: str) -> int:
+    if path and os.path.exists(path):
+        with open(path) as f:
+            return int(f.read().strip() or 0)
+    return 0
+
+async def run_import(kind: str, path: str, fmt: str, checkpoint: str, batch_size: int):
+    start_after = read_checkpoint(checkpoint)
+    if start_after:
+        print(f"Resuming after line {start_after}", file=sys.stderr)
+
+    async def save_checkpoint(last_line: int):
+        if checkpoint:
+            with open(f"{checkpoint}.tmp", "w") as f:
+                f.write(str(last_line))
+            os.replace(f"{checkpoint}.tmp", checkpoint)
+        print(f"  committed through line {last_line}", file=sys.stderr)
+
+    with open(path, encoding="utf-8", newline="") as stream:
+        records = catalog_io.read_records(stream, fmt, kind)
+        result = await catalog_io.import_catalog(kind, records, start_after, batch_size, save_checkpoint)
+    for error in result["errors"]:
+        print(f"  line {error['line']}: {error['error']}", file=sys.stderr)
+    print(f"Imported {result['imported']} {kind}, {result['failed']} rows failed validation", file=sys.stderr)
+
+async def run_export(kind: str, fmt: str):
+    async for chunk in catalog_io.export_catalog(kind, fmt):
+        sys.stdout.write(chunk)
+
+async def main(args):
+    await prisma_client.connect()
+    try:
+        if args.command == "import":
+            fmt = args.format or args.path.rsplit(".", 1)[-1].lower()
+            await run_import(args.kind, args.path, fmt, args.checkpoint, args.batch_size)
+        else:
+            await run_export(args.kind, args.format or "jsonl")
+    finally:
+        await prisma_client.disconnect()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import")
+    import_parser.add_argument("kind", choices=sorted(catalog_io.IMPORT_SCHEMAS))
+    import_parser.add_argument("path")
+    import_parser.add_argument("--format", choices=["csv", "jsonl"])
+    import_parser.add_argument("--checkpoint")
+    import_parser.add_argument("--batch-size", type=int, default=catalog_io.IMPORT_BATCH_SIZE)
+
+    export_parser = commands.add_parser("export")
+    export_parser.add_argument("kind", choices=sorted(catalog_io.EXPORT_FIELDS))
+    export_parser.add_argument("--format", choices=["csv", "jsonl"])
+
+    asyncio.run(main(parser.parse_args()))
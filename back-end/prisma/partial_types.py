@@ -0,0 +1,29 @@
+"""Partial models picked up by `prisma generate` (default partial_type_generator path).
+
+Prisma Client Python has no nested `select`; it builds each query's selection from
+the model it is called on, so a partial whose relations point at narrow partials
+fetches only those columns of the related rows.
+"""
+from prisma.models import CartItem, Pet, Product, Wishlist
+
+# Keep in step with ProductCard / PetCard in app/schemas.py: the fields the cart and
+# wishlist list views render.
+Product.create_partial(
+    "ProductCardRow",
+    include=["id", "name", "category", "petType", "brand", "price", "images", "stock"]
+)
+Pet.create_partial(
+    "PetCardRow",
+    include=["id", "name", "species", "breed", "age", "price", "images", "available"]
+)
+
+CartItem.create_partial(
+    "CartItemWithCards",
+    exclude=["user"],
+    relations={"product": "ProductCardRow", "pet": "PetCardRow"}
+)
+Wishlist.create_partial(
+    "WishlistWithCards",
+    exclude=["user"],
+    relations={"product": "ProductCardRow", "pet": "PetCardRow"}
+)
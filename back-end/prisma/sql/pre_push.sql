@@ -0,0 +1,36 @@
+-- Data fixes that must land before `prisma db push` adds new constraints.
+-- Safe to re-run and a no-op on an empty database.
+
+DO $$
+BEGIN
+  IF to_regclass('"CartItem"') IS NOT NULL THEN
+    -- Fold duplicate cart lines into the oldest row ahead of the (userId, productId)
+    -- and (userId, petId) unique constraints.
+    WITH ranked AS (
+      SELECT "id", "userId", "productId", "petId",
+             row_number() OVER (PARTITION BY "userId", "productId", "petId" ORDER BY "createdAt", "id") AS rn,
+             sum("quantity") OVER (PARTITION BY "userId", "productId", "petId") AS total
+      FROM "CartItem"
+    ),
+    merged AS (
+      UPDATE "CartItem" c
+      SET "quantity" = CASE WHEN r."petId" IS NOT NULL THEN 1 ELSE r.total END
+      FROM ranked r
+      WHERE c."id" = r."id" AND r.rn = 1
+      RETURNING c."id"
+    )
+    DELETE FROM "CartItem" c USING ranked r WHERE c."id" = r."id" AND r.rn > 1;
+  END IF;
+
+  IF to_regclass('"Wishlist"') IS NOT NULL THEN
+    -- Keep the oldest of duplicate wishlist rows ahead of the (userId, productId) and
+    -- (userId, petId) unique constraints.
+    DELETE FROM "Wishlist" w
+    USING (
+      SELECT "id", row_number() OVER (PARTITION BY "userId", "productId", "petId" ORDER BY "addedAt", "id") AS rn
+      FROM "Wishlist"
+    ) r
+    WHERE w."id" = r."id" AND r.rn > 1;
+  END IF;
+END
+$$;
@@ -0,0 +1,39 @@
+-- Full-text search vectors for catalog search. Applied after `prisma db push`;
+-- safe to re-run. Prisma owns the columns and GIN indexes, this file owns the
+-- triggers that keep "searchVector" current and backfills rows that lack one.
+
+CREATE OR REPLACE FUNCTION pet_search_vector() RETURNS trigger AS $$
+BEGIN
+  NEW."searchVector" :=
+    setweight(to_tsvector('simple', coalesce(NEW."name", '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce(NEW."breed", '')), 'B') ||
+    setweight(to_tsvector('simple', coalesce(NEW."description", '')), 'C') ||
+    setweight(to_tsvector('simple', array_to_string(NEW."personality", ' ')), 'C');
+  RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS pet_search_vector ON "Pet";
+CREATE TRIGGER pet_search_vector
+  BEFORE INSERT OR UPDATE OF "name", "breed", "description", "personality", "searchVector" ON "Pet"
+  FOR EACH ROW EXECUTE FUNCTION pet_search_vector();
+
+CREATE OR REPLACE FUNCTION product_search_vector() RETURNS trigger AS $$
+BEGIN
+  NEW."searchVector" :=
+    setweight(to_tsvector('simple', coalesce(NEW."name", '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce(NEW."brand", '')), 'B') ||
+    setweight(to_tsvector('simple', coalesce(NEW."description", '')), 'C') ||
+    setweight(to_tsvector('simple', array_to_string(NEW."filters", ' ')), 'C');
+  RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS product_search_vector ON "Product";
+CREATE TRIGGER product_search_vector
+  BEFORE INSERT OR UPDATE OF "name", "brand", "description", "filters", "searchVector" ON "Product"
+  FOR EACH ROW EXECUTE FUNCTION product_search_vector();
+
+-- Touching the column fires the triggers above for rows created before they existed.
+UPDATE "Pet" SET "searchVector" = NULL WHERE "searchVector" IS NULL;
+UPDATE "Product" SET "searchVector" = NULL WHERE "searchVector" IS NULL;
@@ -1,8 +1,21 @@
 #!/bin/bash
 set -e
 
+echo "Preparing existing data for schema changes..."
+psql "$DATABASE_URL" -v ON_ERROR_STOP=1 -q -f prisma/sql/pre_push.sql
+
 echo "Running Prisma migrations..."
 prisma db push --skip-generate
 
-echo "Starting server..."
-uvicorn app.main:app --host 0.0.0.0 --port 8000
+echo "Applying search triggers..."
+psql "$DATABASE_URL" -v ON_ERROR_STOP=1 -q -f prisma/sql/search.sql
+
+echo "Backfilling order stats..."
+python backfill_stats.py --if-empty
+
+WEB_WORKERS=$(python -c "from app.config import get_settings; print(get_settings().WEB_WORKERS)")
+echo "Starting server with $WEB_WORKERS worker(s)..."
+# Rate limits are per client address, so take it from X-Forwarded-For when the
+# connection comes from the reverse proxy listed in FORWARDED_ALLOW_IPS.
+uvicorn app.main:app --host 0.0.0.0 --port 8000 --workers "$WEB_WORKERS" \
+    --proxy-headers --forwarded-allow-ips "${FORWARDED_ALLOW_IPS:-127.0.0.1}"
@@ -20,7 +20,7 @@ function Cart() {
   const { data: cartItems, isLoading } = useQuery({
     queryKey: ['cart'],
     queryFn: async () => {
-      const response = await api.get('/cart')
+      const response = await api.get('/cart', { params: { expand: 'product,pet' } })
       return response.data
     }
   })
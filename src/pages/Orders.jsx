@@ -1,20 +1,78 @@
-import React from 'react'
+import React, { useEffect } from 'react'
 import { useNavigate } from 'react-router-dom'
-import { useQuery } from '@tanstack/react-query'
+import { useQuery, useQueryClient } from '@tanstack/react-query'
 import { Package, Clock, CheckCircle, XCircle } from 'lucide-react'
 import api from '../services/api'
 
 function Orders() {
   const navigate = useNavigate()
+  const queryClient = useQueryClient()
 
   const { data: orders, isLoading } = useQuery({
     queryKey: ['orders'],
     queryFn: async () => {
-      const response = await api.get('/orders')
+      const response = await api.get('/orders', { params: { expand: 'items' } })
       return response.data
-    }
+    },
+    // Status and tracking changes are pushed by the event stream below.
+    refetchOnWindowFocus: false
   })
 
+  useEffect(() => {
+    if (!localStorage.getItem('token')) return
+
+    let source = null
+    let retry = null
+    let closed = false
+    let lastEventId = null
+
+    // EventSource can't send the Authorization header, so the URL carries a short-lived
+    // stream ticket rather than the login token. The browser reconnects on its own while
+    // the ticket is valid; once a reconnect is refused, open a new stream with a fresh
+    // ticket, resuming after the last event seen.
+    const reconnect = () => {
+      if (!closed) retry = setTimeout(connect, 3000)
+    }
+    const connect = async () => {
+      let ticket
+      try {
+        ticket = (await api.post('/orders/events/ticket')).data.ticket
+      } catch {
+        reconnect()
+        return
+      }
+      if (closed) return
+      const params = new URLSearchParams({ ticket })
+      if (lastEventId) params.set('last_event_id', lastEventId)
+      source = new EventSource(`${api.defaults.baseURL}/orders/events?${params}`)
+      source.onerror = () => {
+        if (source.readyState === EventSource.CLOSED) reconnect()
+      }
+      source.onmessage = onMessage
+    }
+    const onMessage = (message) => {
+      lastEventId = message.lastEventId || lastEventId
+      const event = JSON.parse(message.data)
+      if (event.type === 'created') {
+        queryClient.invalidateQueries({ queryKey: ['orders'] })
+        return
+      }
+      queryClient.setQueryData(['orders'], (current) =>
+        current?.map((order) =>
+          order.id === event.orderId
+            ? { ...order, status: event.status, trackingNumber: event.trackingNumber }
+            : order
+        )
+      )
+    }
+    connect()
+    return () => {
+      closed = true
+      clearTimeout(retry)
+      source?.close()
+    }
+  }, [queryClient])
+
   const getStatusIcon = (status) => {
     switch (status) {
       case 'pending':
@@ -120,7 +178,7 @@ function Orders() {
 
                   <div className="flex items-center justify-between">
                     <p className="text-sm text-gray-600">
-                      {order.items?.length || 0} item{order.items?.length !== 1 ? 's' : ''}
+                      {order.orderItems?.length || 0} item{order.orderItems?.length !== 1 ? 's' : ''}
                     </p>
                     <button
                       onClick={() => navigate(`/orders/${order.id}`)}
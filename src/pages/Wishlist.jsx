@@ -12,7 +12,7 @@ function Wishlist() {
   const { data: wishlistItems, isLoading } = useQuery({
     queryKey: ['wishlist'],
     queryFn: async () => {
-      const response = await api.get('/wishlist')
+      const response = await api.get('/wishlist', { params: { expand: 'product,pet' } })
       return response.data
     }
   })